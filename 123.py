@@ -1,44 +1,41 @@
+import argparse
+import math
 import pygame
 import sys
-import random
 import os
-from sound import bg_music, jump, jump_sound
-
-pygame.init()
-
-WIDTH = 800
-HEIGHT = 700
-FPS = 75
-
-WHITE = (255, 255, 255)
-BLUE = (0, 0, 255)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLACK = (0, 0, 0)
-GRAY = (150, 150, 150)
-YELLOW = (255, 255, 0)
-PURPLE = (128, 0, 128)
-BG_GAME = pygame.image.load('screen/game_bg.jpg')
-BG_MENU = pygame.image.load('screen/menu.jpg')
-
-BG_GAME = pygame.transform.scale(BG_GAME, (WIDTH, HEIGHT))
-BG_MENU = pygame.transform.scale(BG_MENU, (WIDTH, HEIGHT))
-
-PLAYER_SPEED = 5
-JUMP_POWER = -16.5
-GRAVITY = 0.45
-
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Платформер")
-clock = pygame.time.Clock()
-
-CHANGE_COLOR_EVENT = pygame.USEREVENT + 1
-pygame.time.set_timer(CHANGE_COLOR_EVENT, 500)
+import time
+import numpy as np
+from collections import deque
+import sound
+from sound import bg_music, jump, set_volume
+from app import AppContext
+from controls import InputBuffer
+from config import (WIDTH, HEIGHT, TICK_RATE, MAX_FRAME_SKIP, MAX_FPS, RENDER_SCALE, WHITE, BLUE, RED, BLACK, GRAY, YELLOW,
+                    PURPLE)
+from assets import load_image
+from fonts import render_text
+from layers import StaticLayer
+from endless import EndlessLevel
+from particles import ParticleEmitter
+from profiler import FrameProfiler
+from level_loader import level_paths, read_level_data, building
+from replay import Replay, state_checksum
+from world import Player, World
+
+CULL_MARGIN = 200
+VICTORY_PARTICLES = 600
+DEATH_PARTICLES = 200
+CHECKPOINT_PARTICLES = 120
+COLOR_CHANGE_TICKS = TICK_RATE // 2
+PROFILER_REFRESH = 15
+QUICK_SLOTS = 3
+REWIND_TICKS = TICK_RATE * 5
+PREWARM_BUDGET = 0.001
 
 
 class Camera:
     def __init__(self, width, height):
-        self.camera = pygame.Rect(0, 0, width, height)
+        self.camera = pygame.Rect(0, 0, width or WIDTH, height)
         self.width = width
         self.height = height
 
@@ -49,13 +46,27 @@ class Camera:
         return rect.move(self.camera.topleft)
 
     def update(self, target):
-        x = -target.rect.x + int(WIDTH / 2)
-        y = -target.rect.y + int(HEIGHT / 2)
+        self.follow(target.rect.x, target.rect.y)
+
+    def view(self):
+        return pygame.Rect(-self.camera.x, -self.camera.y, WIDTH, HEIGHT)
+
+    def follow(self, target_x, target_y):
+        x = -target_x + int(WIDTH / 2)
+        y = -target_y + int(HEIGHT / 2)
         x = min(0, x)
-        x = max(-(self.width - WIDTH), x)
+        if self.width is not None:
+            x = max(-(self.width - WIDTH), x)
         y = max(-(self.height - HEIGHT), y)
         y = min(0, y)
-        self.camera = pygame.Rect(x, y, self.width, self.height)
+        self.camera = pygame.Rect(x, y, self.width or WIDTH, self.height)
+
+
+def scale_rect(rect, scale):
+    if scale == 1:
+        return rect
+    return pygame.Rect(math.floor(rect.x * scale), math.floor(rect.y * scale), round(rect.width * scale),
+                       round(rect.height * scale))
 
 
 class Button:
@@ -65,16 +76,15 @@ class Button:
         self.hover_color = (200, 200, 200)
         self.text = text
         self.action = action
-        self.font = pygame.font.Font(None, 36)
 
-    def draw(self, surface):
-        mouse_pos = pygame.mouse.get_pos()
-        if self.rect.collidepoint(mouse_pos):
-            pygame.draw.rect(surface, self.hover_color, self.rect)
+    def draw(self, surface, scale=1):
+        rect = scale_rect(self.rect, scale)
+        if rect.collidepoint(pygame.mouse.get_pos()):
+            pygame.draw.rect(surface, self.hover_color, rect)
         else:
-            pygame.draw.rect(surface, self.color, self.rect)
-        text_surf = self.font.render(self.text, True, BLACK)
-        text_rect = text_surf.get_rect(center=self.rect.center)
+            pygame.draw.rect(surface, self.color, rect)
+        text_surf = render_text(self.text, max(1, round(36 * scale)), BLACK)
+        text_rect = text_surf.get_rect(center=rect.center)
         surface.blit(text_surf, text_rect)
 
     def handle_event(self, event):
@@ -83,145 +93,76 @@ class Button:
                 self.action()
 
 
-class Player(pygame.sprite.Sprite):
-    def __init__(self, color=BLUE):
-        super().__init__()
-        self.image = pygame.Surface((30, 50))
-        self.image.fill(color)
-        self.rect = self.image.get_rect(center=(100, HEIGHT // 2))
-        self.velocity = 0
-        self.on_ground = False
-        self.checkpoint = (100, HEIGHT // 2)
-
-    def update_color(self, color):
-        self.image.fill(color)
-
-    def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            self.rect.x -= PLAYER_SPEED
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            self.rect.x += PLAYER_SPEED
-        if keys[pygame.K_SPACE] and self.on_ground:
-            self.velocity = JUMP_POWER
-            self.on_ground = False
-            jump()
-        if keys[pygame.K_r]:
-            self.respawn()
-        self.velocity += GRAVITY
-        self.rect.y += self.velocity
-        if self.rect.y > HEIGHT + 100:
-            self.respawn()
-
-    def respawn(self):
-        self.rect.topleft = self.checkpoint
-        self.velocity = 0
-        self.on_ground = False
-
-
-class Platform(pygame.sprite.Sprite):
-    def __init__(self, x, y, width, height):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(GREEN)
-        self.rect = self.image.get_rect(topleft=(x, y))
-
-
-class MovingPlatform(Platform):
-    def __init__(self, x, y, width, height, move_range):
-        super().__init__(x, y, width, height)
-        self.move_range = move_range
-        self.direction = 1
-        self.speed = 2
-        self.start_x = x
-
-    def update(self):
-        self.rect.x += self.direction * self.speed
-        if self.rect.x > self.start_x + self.move_range or self.rect.x < self.start_x:
-            self.direction *= -1
-
-
-class Checkpoint(pygame.sprite.Sprite):
-    def __init__(self, x, y, width=40, height=60):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(YELLOW)
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self.active = False
-
-    def activate(self):
-        if not self.active:
-            self.image.fill((0, 255, 0))
-            self.active = True
-
-
-class Lava(pygame.sprite.Sprite):
-    def __init__(self, x, y, width=40, height=60):
-        super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(RED)
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self.active = False
-
-    def death(self):
-        if not self.active:
-            self.active = True
-
-
-class Particle(pygame.sprite.Sprite):
-    def __init__(self, pos, dx, dy, group):
-        super().__init__(group)
-        try:
-            self.image = pygame.image.load('star.png').convert_alpha()
-            self.image = pygame.transform.scale(self.image, (20, 20))
-        except Exception as e:
-            print(f"Ошибка загрузки изображения: {e}")
-            self.image = pygame.Surface((20, 20))
-            self.image.fill(YELLOW)
-        self.rect = self.image.get_rect(center=pos)
-        self.velocity = [dx, dy]
-        self.gravity = 0.3
-        self.lifetime = 2000
-        self.spawn_time = pygame.time.get_ticks()
-
-    def update(self, camera_rect, ignore_visible_check=False):
-        self.velocity[1] += self.gravity
-        self.rect.x += self.velocity[0]
-        self.rect.y += self.velocity[1]
-        if pygame.time.get_ticks() - self.spawn_time > self.lifetime:
-            self.kill()
-        if not ignore_visible_check:
-            visible_rect = camera_rect.inflate(200, 200)
-            if not visible_rect.colliderect(self.rect):
-                self.kill()
-
-
-class Level:
-    def __init__(self, number, width, platforms, checkpoints, damage_platforms, finish_point):
-        self.number = number
-        self.width = width
-        self.platforms = platforms
-        self.checkpoints = checkpoints
-        self.damage_platforms = damage_platforms
-        self.finish_point = finish_point
-
-
 class Game:
-    def __init__(self):
+    def __init__(self, app=None):
+        self.app = app if app is not None else AppContext()
+        self.screen = self.app.init()
+        self.scale = self.app.scale
         self.state = "main_menu"
         self.volume = 0.5
         self.player_color = BLUE
         self.levels = []
         self.current_level = 0
-        self.victory_particles = pygame.sprite.Group()
-        self.init_levels()
+        self.rng = np.random.default_rng()
+        self.replay = None
+        self.playback = None
+        self.playback_speed = 1.0
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.skipped_ticks = 0
+        self.frame_dt = None
+        self.last_frame_time = time.perf_counter()
+        self.last_state = None
+        self.input = InputBuffer()
+        self.level_start = None
+        self.level_frame = 0
+        self.next_level = None
+        self.prewarm = None
+        self.endless = None
+        self.quick_slots = [None] * QUICK_SLOTS
+        self.quick_slot = 0
+        self.rewind = deque(maxlen=REWIND_TICKS)
+        self.profiler = FrameProfiler(fps=self.app.frame_rate())
+        self.show_profiler = False
+        self.profiler_lines = []
+        self.profiler_refresh = 0
+        self.profiler_panel = pygame.Surface(self.px(320, 24 * (len(self.profiler.phases) + 7)))
+        self.profiler_panel.set_alpha(180)
+        star = pygame.Surface(self.px(20, 20))
+        star.fill(YELLOW)
+        self.particles = ParticleEmitter(star)
+        spark = pygame.Surface(self.px(6, 6))
+        spark.fill(RED)
+        self.sparks = ParticleEmitter(spark, lifetime=60)
         self.init_menu()
         self.init_settings()
         self.load_volume()
-        self.load_level(0)
         self.dragging_volume = False
-        self.bg_game = BG_GAME
-        self.bg_menu = BG_MENU
+        self.bg_game = None
+        self.bg_menu = self.app.trace.measure("menu.jpg", load_image, 'screen/menu.jpg', self.app.size)
+        self.app.defer("уровни", self.init_levels)
+        self.app.defer("звук", sound.init_audio)
+        self.app.defer("музыка", self.start_music)
+        self.app.defer("game_bg.jpg", self.load_game_background)
+        self.app.defer("частицы", self.load_particles)
+
+    def px(self, x, y):
+        return math.floor(x * self.scale), math.floor(y * self.scale)
+
+    def text(self, text, size, color):
+        return render_text(text, max(1, round(size * self.scale)), color)
+
+    def start_music(self):
+        bg_music()
+
+    def load_game_background(self):
+        self.bg_game = load_image('screen/game_bg.jpg', self.app.size)
+
+    def load_particles(self):
+        self.particles.set_image(self.load_particle_image('star.png', YELLOW))
+
+    def apply_volume(self):
+        set_volume(self.volume)
 
     def load_volume(self):
         if os.path.exists("volume.txt"):
@@ -229,79 +170,21 @@ class Game:
                 with open("volume.txt", "r") as f:
                     vol = float(f.read().strip())
                     self.volume = max(0.0, min(1.0, vol))
-                    pygame.mixer.music.set_volume(self.volume)
-                    if 'jump_sound' in globals():
-                        jump_sound.set_volume(self.volume)
+                    self.apply_volume()
                     print(f"Загружена громкость: {self.volume}")
             except Exception as e:
                 print(f"Ошибка при загрузке громкости: {e}")
 
     def init_levels(self):
-        levels_data = [
-            Level(1, 1200, [
-                Platform(0, HEIGHT - 40, 1200, 40),
-                Platform(300, HEIGHT - 150, 200, 20),
-                Platform(600, HEIGHT - 250, 200, 20),
-                Platform(900, HEIGHT - 350, 200, 20)
-            ], [], [], (1100, HEIGHT - 400)),
-            Level(2, 1600, [
-                Platform(0, HEIGHT - 40, 1600, 40),
-                MovingPlatform(300, HEIGHT - 200, 200, 20, 300),
-                MovingPlatform(700, HEIGHT - 300, 200, 20, 200),
-                Platform(1100, HEIGHT - 400, 200, 20)
-            ], [], [], (1500, HEIGHT - 450)),
-            Level(3, 2000, [
-                Platform(0, HEIGHT - 40, 2000, 40),
-                Platform(300, HEIGHT - 200, 120, 20),
-                Platform(500, HEIGHT - 300, 120, 20),
-                Platform(700, HEIGHT - 400, 120, 20),
-                Platform(900, HEIGHT - 350, 120, 20),
-                Platform(1100, HEIGHT - 250, 120, 20),
-                Platform(1300, HEIGHT - 150, 120, 20),
-                MovingPlatform(1500, HEIGHT - 300, 150, 20, 200),
-            ], [
-                      Checkpoint(100, HEIGHT - 100),
-                      Checkpoint(800, HEIGHT - 450),
-                      Checkpoint(1400, HEIGHT - 200)
-                  ], [
-                      Lava(500, HEIGHT - 100, 2000, 60)
-                  ], (1900, HEIGHT - 450)),
-            Level(4, 2500, [
-                Platform(0, HEIGHT - 40, 2500, 40),
-                Platform(200, HEIGHT - 200, 50, 160),
-                Platform(400, HEIGHT - 350, 200, 20),
-                Platform(700, HEIGHT - 250, 50, 160),
-                Platform(900, HEIGHT - 400, 200, 20),
-                Platform(1200, HEIGHT - 300, 50, 160),
-                MovingPlatform(1500, HEIGHT - 450, 200, 20, 300),
-                Platform(2000, HEIGHT - 450, 200, 20),
-                Platform(1300, HEIGHT - 450, 200, 20)
-            ], [
-                      Checkpoint(100, HEIGHT - 100),
-                      Checkpoint(1400, HEIGHT - 500)
-                  ], [
-                      Lava(300, HEIGHT - 100, 2500, 60)
-                  ], (2400, HEIGHT - 450)),
-            Level(5, 3000, [
-                Platform(0, HEIGHT - 40, 3000, 40),
-                MovingPlatform(300, HEIGHT - 200, 150, 20, 400),
-                Platform(800, HEIGHT - 350, 150, 20),
-                MovingPlatform(1100, HEIGHT - 450, 150, 20, 200),
-                Platform(1600, HEIGHT - 300, 150, 20),
-                MovingPlatform(2000, HEIGHT - 200, 150, 20, 300),
-                Platform(2500, HEIGHT - 450, 150, 20)
-            ], [], [
-                      Lava(300, HEIGHT - 100, 3000, 60)
-                  ], (2900, HEIGHT - 450))
-        ]
-        self.levels = levels_data
+        self.levels = level_paths()
 
     def init_menu(self):
         self.menu_buttons = [
             Button("Начать игру", WIDTH // 2 - 100, 200, 200, 50, self.start_game),
-            Button("Правила игры", WIDTH // 2 - 100, 260, 200, 50, self.show_rules),
-            Button("Настройки", WIDTH // 2 - 100, 320, 200, 50, self.show_settings),
-            Button("Выход", WIDTH // 2 - 100, 380, 200, 50, self.quit_game)
+            Button("Бесконечная игра", WIDTH // 2 - 100, 260, 200, 50, self.start_endless),
+            Button("Правила игры", WIDTH // 2 - 100, 320, 200, 50, self.show_rules),
+            Button("Настройки", WIDTH // 2 - 100, 380, 200, 50, self.show_settings),
+            Button("Выход", WIDTH // 2 - 100, 440, 200, 50, self.quit_game)
         ]
 
     def init_settings(self):
@@ -312,64 +195,177 @@ class Game:
         ]
         self.colors = [BLUE, RED, (255, 165, 0), PURPLE]
         self.current_color = 0
-
-    def load_level(self, level_num):
+        self.volume_bar = pygame.Rect(WIDTH // 2 - 100, 300, 200, 10)
+        self.rules_button = Button("Назад", WIDTH // 2 - 100, HEIGHT - 100, 200, 50, self.show_main_menu)
+        self.congrats_button = Button("В главное меню", WIDTH // 2 - 100, HEIGHT // 2 + 50, 200, 50,
+                                      self.show_main_menu)
+
+    def prepare_level(self, level_num):
+        data = read_level_data(self.levels[level_num])
+        yield
+        level = yield from building(data)
+        world = World(level, Player(self.player_color), fill=False)
+        yield from world.filling()
+        layer = StaticLayer(world.static_sprites, scale=self.scale)
+        camera = Camera(level.width, HEIGHT)
+        camera.update(world.player)
+        yield from layer.baking(camera.view())
+        self.next_level = (level_num, world, layer, camera)
+
+    def prewarm_next_level(self):
+        if self.prewarm is None:
+            size = self.static_layer.tile_size
+            self.prewarm = self.static_layer.baking(self.camera.view().inflate(2 * size, 2 * size))
+        deadline = time.perf_counter() + PREWARM_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                next(self.prewarm)
+            except StopIteration:
+                self.prewarm = None
+                return
+
+    def load_level(self, level_num, level_frame=None):
+        prepared = self.next_level
+        if prepared is None or prepared[0] != level_num:
+            for _ in self.prepare_level(level_num):
+                pass
+            prepared = self.next_level
+        self.next_level = None
+        _, self.world, self.static_layer, self.camera = prepared
         self.current_level = level_num
-        level = self.levels[level_num]
-        self.all_sprites = pygame.sprite.Group()
-        self.platforms = pygame.sprite.Group()
-        self.checkpoints = pygame.sprite.Group()
-        self.moving_platforms = pygame.sprite.Group()
-        self.damage_platforms = pygame.sprite.Group()
-        self.player = Player(self.player_color)
-        self.all_sprites.add(self.player)
-        for platform in level.platforms:
-            self.all_sprites.add(platform)
-            self.platforms.add(platform)
-            if isinstance(platform, MovingPlatform):
-                self.moving_platforms.add(platform)
-        for checkpoint in level.checkpoints:
-            self.all_sprites.add(checkpoint)
-            self.checkpoints.add(checkpoint)
-        for damage_platform in level.damage_platforms:
-            self.all_sprites.add(damage_platform)
-            self.damage_platforms.add(damage_platform)
-        self.finish_rect = pygame.Rect(*level.finish_point, 40, 60)
-        self.camera = Camera(level.width, HEIGHT)
-        self.player.checkpoint = (100, HEIGHT // 2)
-        self.player.respawn()
-
-    def check_finish(self):
-        if self.player.rect.colliderect(self.finish_rect):
+        self.player = self.world.player
+        self.player.update_color(self.player_color)
+        self.world.profiler = self.profiler
+        self.finish_rect = self.world.finish_rect
+        if level_frame is None:
+            level_frame = len(self.replay) if self.replay is not None else 0
+        self.level_frame = level_frame
+        self.level_start = level_num, level_frame, level_frame, self.world.snapshot()
+        self.prewarm = self.prepare_level(level_num + 1) if level_num + 1 < len(self.levels) else None
+
+    def snapshot(self):
+        frames = len(self.replay) if self.replay is not None else 0
+        return self.current_level, self.level_frame, frames, self.world.snapshot()
+
+    def restore(self, snapshot):
+        level, level_frame, frames, blob = snapshot
+        if level != self.current_level:
+            self.load_level(level, level_frame)
+        self.level_frame = level_frame
+        self.level_start = level, level_frame, level_frame, self.level_start[3]
+        self.world.restore(blob)
+        if self.replay is not None:
+            del self.replay.frames[frames:]
+        self.last_state = None
+
+    def quick_save(self):
+        frames = bytes(self.replay.frames) if self.replay is not None else None
+        self.quick_slots[self.quick_slot] = self.snapshot(), frames
+        print(f"Быстрое сохранение: слот {self.quick_slot + 1}")
+
+    def quick_load(self):
+        slot = self.quick_slots[self.quick_slot]
+        if slot is None:
+            print(f"Слот {self.quick_slot + 1} пуст")
+            return
+        snapshot, frames = slot
+        self.rewind.clear()
+        if self.replay is not None and frames is not None:
+            self.replay.frames[:] = frames
+        self.restore(snapshot)
+
+    def restart_level(self):
+        self.rewind.clear()
+        self.restore(self.level_start)
+
+    def check_finish(self, state):
+        if state.finished:
             if self.current_level < len(self.levels) - 1:
-                self.current_level += 1
-                self.load_level(self.current_level)
+                self.load_level(self.current_level + 1)
+                self.profiler.mark("level_switch")
             else:
                 self.create_victory_particles()
                 self.state = "victory"
                 self.camera.update(self.player)
 
+    def load_particle_image(self, path, color):
+        try:
+            return load_image(path, self.px(20, 20), alpha=True)
+        except Exception as e:
+            print(f"Ошибка загрузки изображения: {e}")
+            image = pygame.Surface(self.px(20, 20))
+            image.fill(color)
+            return image
+
     def create_victory_particles(self):
-        pos = self.player.rect.center
-        for _ in range(30):
-            dx = random.randint(-8, 8)
-            dy = random.randint(-15, -8)
-            Particle(pos, dx, dy, self.victory_particles)
+        self.particles.emit(self.player.rect.center, VICTORY_PARTICLES, (-8, 8), (-15, -8), self.rng)
+
+    def start_game(self, seed=None, level=0, record=True):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), "little")
+        self.app.finish_loading()
+        self.rng = np.random.default_rng(seed)
+        self.replay = Replay(level, seed) if record else None
+        self.last_state = None
+        self.quick_slots = [None] * QUICK_SLOTS
+        self.rewind.clear()
+        self.input.reset()
+        self.endless = None
+        self.state = "game"
+        self.current_level = level
+        self.load_level(self.current_level)
 
-    def start_game(self):
+    def start_endless(self, seed=None):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), "little")
+        self.app.finish_loading()
+        self.rng = np.random.default_rng(seed)
+        self.replay = None
+        self.last_state = None
+        self.rewind.clear()
+        self.input.reset()
+        self.next_level = None
         self.state = "game"
         self.current_level = 0
-        self.load_level(self.current_level)
+        self.player = Player(self.player_color)
+        self.world = World(EndlessLevel.level(), self.player)
+        self.world.profiler = self.profiler
+        self.static_layer = StaticLayer(self.world.static_sprites, scale=self.scale)
+        self.finish_rect = self.world.finish_rect
+        self.camera = Camera(None, HEIGHT)
+        self.level_start = None
+        self.level_frame = 0
+        self.endless = EndlessLevel(seed, self.world, self.static_layer)
+        self.endless.update(self.player.rect.x)
+        self.prewarm = None
+
+    def stream_endless(self):
+        self.endless.update(self.player.rect.x)
+
+    def play_replay(self, replay, speed=1.0):
+        self.playback = replay.inputs()
+        self.playback_speed = speed
+        self.start_game(replay.seed, replay.level, record=False)
+
+    def finish_session(self):
+        self.playback = None
+        if self.replay is not None and len(self.replay):
+            self.replay.checksum = state_checksum(self.current_level, self.last_state)
+            try:
+                path = self.replay.save()
+                print(f"Повтор сохранён в {path}")
+            except OSError as e:
+                print(f"Ошибка при сохранении повтора: {e}")
+        self.replay = None
 
     def show_rules(self):
         self.state = "rules"
 
     def draw_rules(self):
-        screen.blit(self.bg_menu, (0, 0))
-        title_font = pygame.font.Font(None, 72)
-        title_text = title_font.render("Правила игры", True, RED)
-        title_rect = title_text.get_rect(center=(WIDTH // 2, 80))
-        screen.blit(title_text, title_rect)
+        self.screen.blit(self.bg_menu, (0, 0))
+        title_text = self.text("Правила игры", 72, RED)
+        title_rect = title_text.get_rect(center=self.px(WIDTH // 2, 80))
+        self.screen.blit(title_text, title_rect)
         rules = [
             "Добро пожаловать в игру ПЛАТФОРМЕР!",
             "Цель игры: Прыгая по платформам, необходимо дойти",
@@ -383,24 +379,27 @@ class Game:
             "ESC - выход в меню.",
             "Удачной игры!"
         ]
-        font = pygame.font.Font(None, 36)
         y = 150
         for line in rules:
-            text = font.render(line, True, RED)
-            screen.blit(text, (50, y))
+            text = self.text(line, 36, RED)
+            self.screen.blit(text, self.px(50, y))
             y += 40
-        back_btn = Button("Назад", WIDTH // 2 - 100, HEIGHT - 100, 200, 50, self.show_main_menu)
-        back_btn.draw(screen)
+        self.rules_button.draw(self.screen, self.scale)
 
     def show_settings(self):
         self.state = "settings"
 
     def show_main_menu(self):
+        self.finish_session()
         self.save_volume()
         self.state = "main_menu"
-        self.victory_particles.empty()
+        self.particles.clear()
+        self.sparks.clear()
+        self.endless = None
+        self.prewarm = None
 
     def quit_game(self):
+        self.finish_session()
         pygame.quit()
         sys.exit()
 
@@ -425,11 +424,20 @@ class Game:
             self.player.update_color(self.player_color)
 
     def handle_events(self):
-        for event in pygame.event.get():
+        for event in self.app.events():
+            self.input.handle(event)
             if event.type == pygame.QUIT:
                 self.quit_game()
-            if event.type == CHANGE_COLOR_EVENT and self.state == "game":
-                self.cycle_player_color()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F11:
+                self.app.toggle_fullscreen()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_profiler = not self.show_profiler
+                self.profiler_refresh = 0
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                try:
+                    print(f"Профиль кадров сохранён в {self.profiler.export()}.csv/.json")
+                except OSError as e:
+                    print(f"Ошибка при сохранении профиля: {e}")
             if self.state == "main_menu":
                 for btn in self.menu_buttons:
                     btn.handle_event(event)
@@ -437,81 +445,162 @@ class Game:
                 for btn in self.settings_buttons:
                     btn.handle_event(event)
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    vol_bar_rect = pygame.Rect(WIDTH // 2 - 100, 300, 200, 10)
-                    if vol_bar_rect.collidepoint(event.pos):
+                    if self.volume_bar.collidepoint(event.pos):
                         self.dragging_volume = True
                         x_rel = event.pos[0] - (WIDTH // 2 - 100)
                         self.volume = max(0.0, min(1.0, x_rel / 200))
-                        pygame.mixer.music.set_volume(self.volume)
-                        if 'jump_sound' in globals():
-                            jump_sound.set_volume(self.volume)
+                        self.apply_volume()
                 elif event.type == pygame.MOUSEBUTTONUP:
                     self.dragging_volume = False
                 elif event.type == pygame.MOUSEMOTION and self.dragging_volume:
                     x_rel = event.pos[0] - (WIDTH // 2 - 100)
                     self.volume = max(0.0, min(1.0, x_rel / 200))
-                    pygame.mixer.music.set_volume(self.volume)
-                    if 'jump_sound' in globals():
-                        jump_sound.set_volume(self.volume)
+                    self.apply_volume()
             elif self.state == "game":
                 if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                     self.show_main_menu()
+                elif event.type == pygame.KEYDOWN and self.playback is None and self.endless is None:
+                    if event.key == pygame.K_F5:
+                        self.quick_save()
+                    elif event.key == pygame.K_F6:
+                        self.quick_slot = (self.quick_slot + 1) % QUICK_SLOTS
+                        print(f"Выбран слот {self.quick_slot + 1}")
+                    elif event.key == pygame.K_F9:
+                        self.quick_load()
+                    elif event.key == pygame.K_F8:
+                        self.restart_level()
             elif self.state == "rules":
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    back_btn = Button("Назад", WIDTH // 2 - 100, HEIGHT - 100, 200, 50, None)
-                    if back_btn.rect.collidepoint(event.pos):
-                        self.show_main_menu()
+                self.rules_button.handle_event(event)
             elif self.state == "congratulations":
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    btn_rect = pygame.Rect(WIDTH // 2 - 100, HEIGHT // 2 + 50, 200, 50)
-                    if btn_rect.collidepoint(event.pos):
-                        self.show_main_menu()
+                self.congrats_button.handle_event(event)
+
+    def next_inputs(self):
+        if self.playback is None:
+            return self.input.next_tick()
+        inputs = next(self.playback, None)
+        if inputs is None:
+            self.show_main_menu()
+        return inputs
+
+    def take_ticks(self, elapsed, speed=1.0):
+        self.accumulator += elapsed * TICK_RATE * speed
+        ticks = int(self.accumulator)
+        limit = MAX_FRAME_SKIP * max(1, int(speed))
+        if ticks > limit:
+            self.skipped_ticks += ticks - limit
+            self.accumulator -= ticks - limit
+            ticks = limit
+        self.accumulator -= ticks
+        self.alpha = self.accumulator
+        return ticks
+
+    def update_game(self, elapsed):
+        speed = self.playback_speed if self.playback is not None else 1.0
+        for _ in range(self.take_ticks(elapsed, speed)):
+            if self.state != "game":
+                break
+            self.run_game()
+
+    def update_victory(self, elapsed):
+        for _ in range(self.take_ticks(elapsed)):
+            self.particles.update()
+            self.sparks.update()
 
     def run_game(self):
-        self.camera.update(self.player)
-        self.all_sprites.update()
-        for platform in self.moving_platforms:
-            platform.update()
-        hits = pygame.sprite.spritecollide(self.player, self.platforms, False)
-        if hits:
-            if self.player.velocity > 0:
-                self.player.rect.bottom = hits[0].rect.top
-                self.player.on_ground = True
-                self.player.velocity = 0
-            elif self.player.velocity < 0:
-                self.player.rect.top = hits[0].rect.bottom
-                self.player.velocity = 0
-        checkpoint_hits = pygame.sprite.spritecollide(self.player, self.checkpoints, False)
-        for checkpoint in checkpoint_hits:
-            checkpoint.activate()
-            self.player.checkpoint = checkpoint.rect.topleft
-        damage_hits = pygame.sprite.spritecollide(self.player, self.damage_platforms, False)
-        for damage in damage_hits:
-            damage.death()
-            self.player.respawn()
-        self.check_finish()
+        can_rewind = self.playback is None and self.endless is None
+        if can_rewind and self.input.rewinding():
+            if self.rewind:
+                self.restore(self.rewind.pop())
+            return
+        inputs = self.next_inputs()
+        if inputs is None:
+            return
+        if can_rewind:
+            self.rewind.append(self.snapshot())
+        if self.replay is not None:
+            self.replay.record(inputs)
+        death_pos = self.player.rect.center
+        state = self.world.step(inputs)
+        self.last_state = state
+        if state.jumped:
+            jump()
+        if state.died:
+            self.sparks.emit(death_pos, DEATH_PARTICLES, (-6, 6), (-12, -2), self.rng)
+        if state.activated is not None:
+            self.particles.emit(state.activated.rect.center, CHECKPOINT_PARTICLES, (-5, 5), (-10, -4), self.rng)
+        if state.tick % COLOR_CHANGE_TICKS == 0:
+            self.cycle_player_color()
+        self.particles.update()
+        self.sparks.update()
+        self.profiler.mark("particles")
+        self.check_finish(state)
+
+    def render_pos(self, sprite):
+        prev = getattr(sprite, "prev_pos", None)
+        if prev is None:
+            return sprite.rect.topleft
+        alpha = self.alpha
+        return (round(prev[0] + (sprite.rect.x - prev[0]) * alpha),
+                round(prev[1] + (sprite.rect.y - prev[1]) * alpha))
+
+    def draw_world(self):
+        self.camera.follow(*self.render_pos(self.player))
+        self.static_layer.draw(self.screen, self.camera)
+        ox, oy = self.camera.camera.topleft
+        view = self.camera.view().inflate(CULL_MARGIN, CULL_MARGIN)
+        for sprite in self.world.visible_sprites(view):
+            x, y = self.render_pos(sprite)
+            sprite.draw(self.screen, self.px(x + ox, y + oy), self.scale)
+
+    def draw_particles(self):
+        self.sparks.draw(self.screen, self.camera.camera.topleft, self.scale)
+        self.particles.draw(self.screen, self.camera.camera.topleft, self.scale)
 
     def draw_ui(self):
-        font = pygame.font.Font(None, 36)
-        level_text = font.render(f"Уровень: {self.current_level + 1}", True, BLACK)
-        screen.blit(level_text, (10, 10))
-        checkpoint_text = font.render(f"Чекпоинт: X:{self.player.checkpoint[0]} Y:{self.player.checkpoint[1]}", True,
-                                      BLACK)
-        screen.blit(checkpoint_text, (10, 50))
-        pygame.draw.rect(screen, PURPLE, self.camera.apply_rect(self.finish_rect))
+        if self.endless is not None:
+            level_text = self.text(f"Дистанция: {self.endless.distance() // 50} м", 36, BLACK)
+        else:
+            level_text = self.text(f"Уровень: {self.current_level + 1}", 36, BLACK)
+        self.screen.blit(level_text, self.px(10, 10))
+        checkpoint_text = self.text(f"Чекпоинт: X:{self.player.checkpoint[0]} Y:{self.player.checkpoint[1]}", 36,
+                                    BLACK)
+        self.screen.blit(checkpoint_text, self.px(10, 50))
+        if self.finish_rect:
+            pygame.draw.rect(self.screen, PURPLE, scale_rect(self.camera.apply_rect(self.finish_rect), self.scale))
+
+    def draw_profiler(self):
+        if self.profiler_refresh <= 0:
+            self.profiler_refresh = PROFILER_REFRESH
+            averages = self.profiler.averages(self.profiler.fps)
+            total = sum(averages.values())
+            budget = self.profiler.budget / 1e6
+            self.profiler_lines = [(f"Кадр: {total:.2f} мс (бюджет {budget:.1f})", RED if total > budget else WHITE)]
+            for name, value in averages.items():
+                self.profiler_lines.append((f"{name}: {value:.2f} мс", WHITE))
+            self.profiler_lines.append((f"Сверх бюджета: {self.profiler.over_budget()}", WHITE))
+            self.profiler_lines.append((f"Пропущено тиков: {self.skipped_ticks}", RED if self.skipped_ticks else WHITE))
+            latency, worst_latency = self.input.latency()
+            color = RED if worst_latency > 1000 / TICK_RATE else WHITE
+            self.profiler_lines.append((f"Очередь до тика: {latency:.1f} мс (макс. {worst_latency:.1f})", color))
+            for total_ms, phase, phase_ms in self.profiler.worst(3):
+                color = RED if total_ms > budget else WHITE
+                self.profiler_lines.append((f"{total_ms:.1f} мс: {phase} {phase_ms:.1f}", color))
+        self.profiler_refresh -= 1
+        self.screen.blit(self.profiler_panel, self.px(WIDTH - 330, 10))
+        y = 14
+        for text, color in self.profiler_lines:
+            self.screen.blit(self.text(text, 24, color), self.px(WIDTH - 325, y))
+            y += 24
 
     def draw_congratulations(self):
-        screen.blit(self.bg_menu, (0, 0))
-        font_big = pygame.font.Font(None, 72)
-        congrats_text = font_big.render("Поздравляем!", True, BLACK)
-        congrats_rect = congrats_text.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 50))
-        screen.blit(congrats_text, congrats_rect)
-        font_small = pygame.font.Font(None, 36)
-        info_text = font_small.render("Вы прошли игру", True, BLACK)
-        info_rect = info_text.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-        screen.blit(info_text, info_rect)
-        button = Button("В главное меню", WIDTH // 2 - 100, HEIGHT // 2 + 50, 200, 50, self.show_main_menu)
-        button.draw(screen)
+        self.screen.blit(self.bg_menu, (0, 0))
+        congrats_text = self.text("Поздравляем!", 72, BLACK)
+        congrats_rect = congrats_text.get_rect(center=self.px(WIDTH // 2, HEIGHT // 2 - 50))
+        self.screen.blit(congrats_text, congrats_rect)
+        info_text = self.text("Вы прошли игру", 36, BLACK)
+        info_rect = info_text.get_rect(center=self.px(WIDTH // 2, HEIGHT // 2))
+        self.screen.blit(info_text, info_rect)
+        self.congrats_button.draw(self.screen, self.scale)
 
     def save_volume(self):
         try:
@@ -521,58 +610,93 @@ class Game:
         except Exception as e:
             print(f"Ошибка при сохранении громкости: {e}")
 
+    def frame(self):
+        now = time.perf_counter()
+        elapsed = self.frame_dt if self.frame_dt is not None else now - self.last_frame_time
+        self.last_frame_time = now
+        profiler = self.profiler
+        profiler.begin_frame()
+        self.handle_events()
+        profiler.mark("events")
+        self.screen.fill(WHITE)
+        if self.state in ["main_menu", "settings", "rules"]:
+            self.screen.blit(self.bg_menu, (0, 0))
+        elif self.state == "game":
+            self.screen.blit(self.bg_game, (0, 0))
+        profiler.mark("background")
+        if self.state == "main_menu":
+            for btn in self.menu_buttons:
+                btn.draw(self.screen, self.scale)
+            title_text = self.text("Платформер", 72, BLACK)
+            title_rect = title_text.get_rect(center=self.px(WIDTH // 2, 100))
+            self.screen.blit(title_text, title_rect)
+        elif self.state == "rules":
+            self.draw_rules()
+        elif self.state == "settings":
+            for btn in self.settings_buttons:
+                btn.draw(self.screen, self.scale)
+            color_text = self.text("Цвет игрока:", 36, BLACK)
+            self.screen.blit(color_text, self.px(WIDTH // 2 - 150, 200))
+            color_rect = pygame.Rect(WIDTH // 2 + 90, 200, 50, 30)
+            pygame.draw.rect(self.screen, self.player_color, scale_rect(color_rect, self.scale))
+            volume_text = self.text(f"Громкость: {int(self.volume * 100)}%", 36, BLACK)
+            self.screen.blit(volume_text, self.px(WIDTH // 2 - 100, 260))
+            pygame.draw.rect(self.screen, GRAY, scale_rect(self.volume_bar, self.scale))
+            pygame.draw.circle(self.screen, RED, self.px(WIDTH // 2 - 100 + int(200 * self.volume), 305),
+                               max(1, round(10 * self.scale)))
+        elif self.state == "game":
+            self.update_game(elapsed)
+            if self.endless is not None:
+                self.stream_endless()
+            self.draw_world()
+            profiler.mark("sprites")
+            self.draw_particles()
+            profiler.mark("particles")
+            self.prewarm_next_level()
+            profiler.mark("prewarm")
+            self.draw_ui()
+        elif self.state == "victory":
+            self.screen.blit(self.bg_game, (0, 0))
+            profiler.mark("background")
+            self.draw_world()
+            profiler.mark("sprites")
+            self.update_victory(elapsed)
+            self.draw_particles()
+            profiler.mark("particles")
+            self.draw_ui()
+            if not self.particles:
+                self.state = "congratulations"
+        elif self.state == "congratulations":
+            self.draw_congratulations()
+        if self.show_profiler:
+            self.draw_profiler()
+        profiler.mark("ui")
+        self.app.present()
+        profiler.mark("flip")
+        profiler.end_frame()
+
     def run(self):
-        bg_music()
+        self.frame()
+        self.app.trace.mark("первый кадр меню")
         while True:
-            self.handle_events()
-            screen.fill(WHITE)
-            if self.state in ["main_menu", "settings", "rules"]:
-                screen.blit(self.bg_menu, (0, 0))
-            elif self.state == "game":
-                screen.blit(self.bg_game, (0, 0))
-            if self.state == "main_menu":
-                for btn in self.menu_buttons:
-                    btn.draw(screen)
-                title_font = pygame.font.Font(None, 72)
-                title_text = title_font.render("Платформер", True, BLACK)
-                title_rect = title_text.get_rect(center=(WIDTH // 2, 100))
-                screen.blit(title_text, title_rect)
-            elif self.state == "rules":
-                self.draw_rules()
-            elif self.state == "settings":
-                for btn in self.settings_buttons:
-                    btn.draw(screen)
-                font = pygame.font.Font(None, 36)
-                color_text = font.render("Цвет игрока:", True, BLACK)
-                screen.blit(color_text, (WIDTH // 2 - 150, 200))
-                color_rect = pygame.Rect(WIDTH // 2 + 90, 200, 50, 30)
-                pygame.draw.rect(screen, self.player_color, color_rect)
-                volume_text = font.render(f"Громкость: {int(self.volume * 100)}%", True, BLACK)
-                screen.blit(volume_text, (WIDTH // 2 - 100, 260))
-                pygame.draw.rect(screen, GRAY, (WIDTH // 2 - 100, 300, 200, 10))
-                pygame.draw.circle(screen, RED, (WIDTH // 2 - 100 + int(200 * self.volume), 305), 10)
-            elif self.state == "game":
-                self.run_game()
-                for sprite in self.all_sprites:
-                    screen.blit(sprite.image, self.camera.apply(sprite))
-                self.draw_ui()
-            elif self.state == "victory":
-                for particle in self.victory_particles:
-                    particle.update(self.camera.camera, ignore_visible_check=True)
-                screen.blit(self.bg_game, (0, 0))
-                for sprite in self.all_sprites:
-                    screen.blit(sprite.image, self.camera.apply(sprite))
-                for particle in self.victory_particles:
-                    screen.blit(particle.image, self.camera.apply_rect(particle.rect))
-                self.draw_ui()
-                if not self.victory_particles:
-                    self.state = "congratulations"
-            elif self.state == "congratulations":
-                self.draw_congratulations()
-            pygame.display.flip()
-            clock.tick(FPS)
+            self.app.load_next()
+            self.app.tick()
+            self.frame()
 
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Платформер")
+    parser.add_argument("--trace-startup", action="store_true", help="вывести время этапов запуска")
+    parser.add_argument("--no-vsync", action="store_true", help="отключить вертикальную синхронизацию")
+    parser.add_argument("--fps", type=int, default=MAX_FPS,
+                        help="ограничение кадров в секунду без вертикальной синхронизации, 0 - без ограничения")
+    parser.add_argument("--render-scale", type=float, default=RENDER_SCALE,
+                        help="доля внутреннего разрешения отрисовки от 800x700, от 0 до 1")
+    args = parser.parse_args()
+    if args.fps < 0:
+        parser.error("--fps не может быть отрицательным")
+    if not 0 < args.render_scale <= 1:
+        parser.error("--render-scale должен быть больше 0 и не больше 1")
+    game = Game(AppContext(trace=args.trace_startup, vsync=not args.no_vsync, max_fps=args.fps,
+                           render_scale=args.render_scale))
     game.run()
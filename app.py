@@ -0,0 +1,104 @@
+import time
+
+import pygame
+
+from config import WIDTH, HEIGHT, MAX_FPS, VSYNC, RENDER_SCALE
+
+SCALE_STEP = 64
+MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+
+
+class StartupTrace:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.steps = []
+
+    def measure(self, name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        end = time.perf_counter()
+        self.steps.append((name, (end - start) * 1000, (end - self.origin) * 1000))
+        return result
+
+    def mark(self, name):
+        self.steps.append((name, 0.0, (time.perf_counter() - self.origin) * 1000))
+
+    def report(self):
+        print("Запуск:")
+        for name, duration, at in self.steps:
+            print(f"  {at:8.1f} мс  {duration:7.1f} мс  {name}")
+
+
+def open_display(size, vsync):
+    flags = pygame.SCALED | pygame.RESIZABLE
+    if vsync:
+        try:
+            return pygame.display.set_mode(size, flags, vsync=1), True
+        except pygame.error as e:
+            print(f"Вертикальная синхронизация недоступна: {e}")
+    return pygame.display.set_mode(size, flags), False
+
+
+class AppContext:
+    def __init__(self, trace=False, vsync=VSYNC, max_fps=MAX_FPS, render_scale=RENDER_SCALE):
+        self.trace = StartupTrace()
+        self.print_trace = trace
+        self.vsync = vsync
+        self.scale = max(1, round(render_scale * SCALE_STEP)) / SCALE_STEP
+        self.size = (int(WIDTH * self.scale), int(HEIGHT * self.scale))
+        self.vsync_active = False
+        self.max_fps = max_fps
+        self.screen = None
+        self.clock = None
+        self.pending = []
+
+    def init(self):
+        if self.screen is None:
+            self.trace.measure("pygame.display.init", pygame.display.init)
+            self.trace.measure("pygame.font.init", pygame.font.init)
+            self.screen, self.vsync_active = self.trace.measure("set_mode", open_display, self.size, self.vsync)
+            pygame.display.set_caption("Платформер")
+            self.clock = pygame.time.Clock()
+        return self.screen
+
+    def logical_pos(self, pos):
+        return int(pos[0] / self.scale), int(pos[1] / self.scale)
+
+    def mouse_pos(self):
+        return self.logical_pos(pygame.mouse.get_pos())
+
+    def events(self):
+        events = pygame.event.get()
+        if self.scale != 1:
+            for event in events:
+                if event.type in MOUSE_EVENTS:
+                    event.pos = self.logical_pos(event.pos)
+        return events
+
+    def frame_rate(self):
+        return 0 if self.vsync_active else self.max_fps
+
+    def tick(self):
+        return self.clock.tick(self.frame_rate())
+
+    def present(self):
+        pygame.display.flip()
+
+    def toggle_fullscreen(self):
+        pygame.display.toggle_fullscreen()
+
+    def defer(self, name, func):
+        self.pending.append((name, func))
+
+    def load_next(self):
+        if not self.pending:
+            return False
+        name, func = self.pending.pop(0)
+        self.trace.measure(name, func)
+        if not self.pending and self.print_trace:
+            self.trace.report()
+        return True
+
+    def finish_loading(self):
+        while self.load_next():
+            pass
@@ -0,0 +1,31 @@
+import pygame
+
+_images = {}
+_stats = {"hits": 0, "misses": 0}
+
+
+def load_image(path, size=None, alpha=False):
+    key = (path, size, alpha)
+    image = _images.get(key)
+    if image is not None:
+        _stats["hits"] += 1
+        return image
+    _stats["misses"] += 1
+    if size is None:
+        image = pygame.image.load(path)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if alpha else image.convert()
+    else:
+        image = pygame.transform.scale(load_image(path, alpha=alpha), size)
+    _images[key] = image
+    return image
+
+
+def cache_stats():
+    return dict(_stats, images=len(_images))
+
+
+def clear_cache():
+    _images.clear()
+    _stats["hits"] = 0
+    _stats["misses"] = 0
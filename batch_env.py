@@ -0,0 +1,226 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from config import (HEIGHT, TICK_RATE, PLAYER_SPEED, JUMP_POWER, GRAVITY, MAX_FALL_SPEED, JUMP_BUFFER_TICKS,
+                    COYOTE_TICKS)
+from level_loader import level_paths, read_level
+from world import MovingPlatform
+
+PLAYER_WIDTH = 30
+PLAYER_HEIGHT = 50
+SPAWN = (100, HEIGHT // 2)
+FINISH_REWARD = 100.0
+DEATH_PENALTY = 10.0
+ACTIONS = ("left", "right", "jump", "respawn")
+OBSERVATIONS = ("x", "y", "velocity", "on_ground", "checkpoint_x", "checkpoint_y")
+
+
+def round_rect(values):
+    return np.where(values >= 0, np.floor(values + 0.5), np.ceil(values - 0.5))
+
+
+def edges(rects):
+    rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    return rects[:, 0], rects[:, 1], rects[:, 0] + rects[:, 2], rects[:, 1] + rects[:, 3]
+
+
+def collide(left, top, right, bottom, rects):
+    r_left, r_top, r_right, r_bottom = rects
+    return ((left[:, None] < r_right) & (right[:, None] > r_left) &
+            (top[:, None] < r_bottom) & (bottom[:, None] > r_top))
+
+
+class BatchEnv:
+    def __init__(self, level, count, max_ticks=TICK_RATE * 60, speed=PLAYER_SPEED, jump_power=JUMP_POWER,
+                 gravity=GRAVITY, auto_reset=True):
+        self.count = count
+        self.max_ticks = max_ticks
+        self.auto_reset = auto_reset
+        self.speed = np.broadcast_to(np.asarray(speed, dtype=np.float64), (count,))
+        self.jump_power = np.broadcast_to(np.asarray(jump_power, dtype=np.float64), (count,))
+        self.gravity = np.broadcast_to(np.asarray(gravity, dtype=np.float64), (count,))
+
+        platforms = level.platforms
+        self.left, self.top, self.right, self.bottom = edges([tuple(p.rect) for p in platforms])
+        self.width = self.right - self.left
+        slots = [i for i, p in enumerate(platforms) if isinstance(p, MovingPlatform)]
+        self.mover_slots = np.array(slots, dtype=np.intp)
+        self.mover_of = np.full(len(platforms), -1, dtype=np.intp)
+        self.mover_of[self.mover_slots] = np.arange(len(slots))
+        self.mover_start = np.array([platforms[i].start_x for i in slots], dtype=np.float64)
+        self.mover_speed = np.array([platforms[i].speed for i in slots], dtype=np.float64)
+        self.mover_turn = np.array([platforms[i].turn for i in slots], dtype=np.int64)
+        self.checkpoints = edges([tuple(c.rect) for c in level.checkpoints])
+        self.lava = edges([tuple(d.rect) for d in level.damage_platforms])
+        if level.finish_point is not None:
+            self.finish = edges([(*level.finish_point, 40, 60)])
+            self.target = (level.finish_point[0] + 20, level.finish_point[1] + 30)
+        else:
+            self.finish = edges([])
+            self.target = None
+
+        self.tick = np.zeros(count, dtype=np.int64)
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.velocity = np.zeros(count)
+        self.on_ground = np.zeros(count, dtype=bool)
+        self.ground = np.full(count, -1, dtype=np.intp)
+        self.jump_buffer = np.zeros(count, dtype=np.int64)
+        self.air_ticks = np.zeros(count, dtype=np.int64)
+        self.checkpoint_x = np.zeros(count)
+        self.checkpoint_y = np.zeros(count)
+        self.activated = np.zeros((count, len(level.checkpoints)), dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        mask = np.ones(self.count, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self.tick[mask] = 0
+        self.checkpoint_x[mask] = SPAWN[0]
+        self.checkpoint_y[mask] = SPAWN[1]
+        self.activated[mask] = False
+        self.respawn(mask)
+        return self.observe()
+
+    def respawn(self, mask):
+        self.x[mask] = self.checkpoint_x[mask]
+        self.y[mask] = self.checkpoint_y[mask]
+        self.velocity[mask] = 0
+        self.on_ground[mask] = False
+        self.ground[mask] = -1
+        self.jump_buffer[mask] = 0
+        self.air_ticks[mask] = COYOTE_TICKS + 1
+
+    def observe(self):
+        return np.stack([self.x, self.y, self.velocity, self.on_ground, self.checkpoint_x, self.checkpoint_y],
+                        axis=1).astype(np.float32)
+
+    def distance(self):
+        if self.target is None:
+            return np.zeros(self.count)
+        return np.hypot(self.x + PLAYER_WIDTH / 2 - self.target[0], self.y + PLAYER_HEIGHT / 2 - self.target[1])
+
+    def mover_x(self, tick):
+        if not len(self.mover_slots):
+            return np.zeros((self.count, 0))
+        turn = self.mover_turn
+        phase = (tick[:, None] + 1) % (2 * turn)
+        forward = self.mover_start + self.mover_speed * (phase - 1)
+        back = self.mover_start + self.mover_speed * (2 * turn - phase - 1)
+        return np.where(phase < turn, forward, back)
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=bool)
+        left, right, jump, respawn = actions[:, 0], actions[:, 1], actions[:, 2], actions[:, 3]
+        rows = np.arange(self.count)
+        before = self.distance()
+        ground = self.ground.copy()
+        movers_before = self.mover_x(self.tick)
+        self.tick += 1
+
+        self.jump_buffer = np.where(jump, JUMP_BUFFER_TICKS, self.jump_buffer)
+        jumped = (self.jump_buffer > 0) & (self.air_ticks <= COYOTE_TICKS)
+        self.velocity = np.where(jumped, self.jump_power, self.velocity)
+        self.on_ground &= ~jumped
+        self.ground[jumped] = -1
+        self.jump_buffer = np.where(jumped, 0, np.maximum(self.jump_buffer - 1, 0))
+        self.air_ticks[jumped] = COYOTE_TICKS + 1
+        self.respawn(respawn)
+        self.velocity = np.minimum(self.velocity + self.gravity, MAX_FALL_SPEED)
+        dx = self.speed * (right.astype(np.float64) - left)
+        dy = self.velocity.copy()
+
+        movers = self.mover_x(self.tick)
+        plat_left = np.broadcast_to(self.left, (self.count, len(self.left))).copy()
+        plat_left[:, self.mover_slots] = movers
+        plat_right = plat_left + self.width
+        carried = (ground >= 0) & (self.ground == ground)
+        mover = np.where(carried, self.mover_of[np.maximum(ground, 0)], -1)
+        moving = mover >= 0
+        dx[moving] += movers[rows[moving], mover[moving]] - movers_before[rows[moving], mover[moving]]
+
+        start_x, start_y = self.x.copy(), self.y.copy()
+        x = round_rect(start_x + dx)
+        y = start_y
+        vertical = (self.top < (y + PLAYER_HEIGHT)[:, None]) & (self.bottom > y[:, None])
+        hits = ((plat_left < (np.maximum(start_x, x) + PLAYER_WIDTH)[:, None]) &
+                (plat_right > np.minimum(start_x, x)[:, None]) & vertical)
+        wall = np.where(hits & (plat_left >= (start_x + PLAYER_WIDTH)[:, None]), plat_left, np.inf).min(axis=1)
+        x = np.where((dx > 0) & (wall < x + PLAYER_WIDTH), wall - PLAYER_WIDTH, x)
+        wall = np.where(hits & (plat_right <= start_x[:, None]), plat_right, -np.inf).max(axis=1)
+        x = np.where((dx < 0) & (wall > x), wall, x)
+
+        y = round_rect(start_y + dy)
+        horizontal = (plat_left < (x + PLAYER_WIDTH)[:, None]) & (plat_right > x[:, None])
+        hits = (horizontal & (self.top < (np.maximum(start_y, y) + PLAYER_HEIGHT)[:, None]) &
+                (self.bottom > np.minimum(start_y, y)[:, None]))
+        overlap = horizontal & (self.top < (start_y + PLAYER_HEIGHT)[:, None]) & (self.bottom > start_y[:, None])
+        landing = hits & ((self.top >= (start_y + PLAYER_HEIGHT)[:, None]) | overlap)
+        probe = horizontal & (self.top == (y + PLAYER_HEIGHT)[:, None]) & (self.velocity >= 0)[:, None]
+        landing = np.where(landing.any(axis=1)[:, None], landing, probe)
+        down = dy >= 0
+        landed = down & landing.any(axis=1)
+        ground = np.where(landing, self.top, np.inf).argmin(axis=1)
+        y = np.where(landed, self.top[ground] - PLAYER_HEIGHT, y)
+        ceiling = np.where(hits & (self.bottom <= start_y[:, None]), self.bottom, -np.inf).max(axis=1)
+        bonked = ~down & (ceiling > -np.inf)
+        y = np.where(bonked, np.maximum(y, ceiling), y)
+        self.velocity = np.where(landed | bonked, 0.0, self.velocity)
+        self.on_ground = landed
+        self.ground = np.where(landed, ground, -1)
+        self.x, self.y = x, y
+        self.air_ticks = np.where(landed, 0, np.minimum(self.air_ticks + 1, COYOTE_TICKS + 1))
+
+        swept = (np.minimum(start_x, x), np.minimum(start_y, y),
+                 np.maximum(start_x, x) + PLAYER_WIDTH, np.maximum(start_y, y) + PLAYER_HEIGHT)
+        fell = y > HEIGHT + 100
+        self.respawn(fell)
+        reached = collide(*swept, self.checkpoints)
+        if reached.shape[1]:
+            self.activated |= reached
+            found = reached.any(axis=1)
+            last = reached.shape[1] - 1 - reached[:, ::-1].argmax(axis=1)
+            self.checkpoint_x = np.where(found, self.checkpoints[0][last], self.checkpoint_x)
+            self.checkpoint_y = np.where(found, self.checkpoints[1][last], self.checkpoint_y)
+        finished = collide(*swept, self.finish).any(axis=1)
+        died = collide(*swept, self.lava).any(axis=1)
+        self.respawn(died)
+        finished &= ~died
+
+        reward = before - self.distance() + FINISH_REWARD * finished - DEATH_PENALTY * (died | fell)
+        done = finished | (self.tick >= self.max_ticks)
+        observations = self.observe()
+        if self.auto_reset and done.any():
+            self.reset(done)
+        return observations, reward, done, finished
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная симуляция уровня без окна")
+    parser.add_argument("level", nargs="?", type=int, default=1)
+    parser.add_argument("--envs", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=TICK_RATE * 10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    env = BatchEnv(read_level(level_paths()[args.level - 1]), args.envs)
+    rng = np.random.default_rng(args.seed)
+    actions = np.zeros((args.envs, len(ACTIONS)), dtype=bool)
+    finishes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        actions[:, 1] = rng.random(args.envs) < 0.9
+        actions[:, 0] = ~actions[:, 1] & (rng.random(args.envs) < 0.5)
+        actions[:, 2] = rng.random(args.envs) < 0.1
+        _, _, _, finished = env.step(actions)
+        finishes += int(finished.sum())
+    elapsed = time.perf_counter() - start
+    print(f"Уровень {args.level}: {args.envs} копий, {args.steps} тиков, {elapsed:.2f} с, "
+          f"{args.envs * args.steps / elapsed:.0f} шагов/с, финишей: {finishes}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
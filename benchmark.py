@@ -0,0 +1,214 @@
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from app import AppContext
+from config import WIDTH, TICK_RATE, RENDER_SCALE
+from level_loader import level_paths
+from particles import PARTICLE_LIFETIME
+from replay import Replay, encode_inputs
+from world import Inputs
+
+WARMUP_FRAMES = 10
+ALLOC_FRAMES = 60
+RUN_RIGHT = Inputs(right=True)
+RUN_RIGHT_JUMP = Inputs(right=True, jump=True)
+
+
+def scripted_route(frames, period=45):
+    route = bytearray()
+    while len(route) < frames:
+        route.extend([encode_inputs(RUN_RIGHT)] * (period - 1))
+        route.append(encode_inputs(RUN_RIGHT_JUMP))
+    return bytes(route[:frames])
+
+
+def main_menu(game, frames):
+    game.state = "main_menu"
+
+    def before(i):
+        button = game.menu_buttons[i % len(game.menu_buttons)]
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=button.rect.center, rel=(0, 0), buttons=(0, 0, 0)))
+    return before, frames
+
+
+def settings(game, frames):
+    game.state = "settings"
+    bar_x = WIDTH // 2 - 100
+
+    def before(i):
+        x = bar_x + (i * 7) % 200
+        if i % 60 == 0:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, 305), button=1))
+        elif i % 60 == 59:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(x, 305), button=1))
+        else:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(x, 305), rel=(7, 0), buttons=(1, 0, 0)))
+    return before, frames
+
+
+def load_route(routes, number, frames):
+    name = os.path.splitext(os.path.basename(level_paths()[number]))[0] + ".rpl"
+    try:
+        replay = Replay.load(os.path.join(routes, name))
+    except (OSError, ValueError):
+        replay = None
+    if replay is None or replay.level != number or len(replay) < 2:
+        print(f"Маршрут {name} не найден, используется сценарий бега вправо")
+        return Replay(number, 1, scripted_route(frames))
+    return Replay(number, replay.seed, replay.frames[:-1])
+
+
+def level(number, routes):
+    def scenario(game, frames):
+        replay = load_route(routes, number, frames + WARMUP_FRAMES + ALLOC_FRAMES)
+
+        def before(i):
+            if game.state != "game" or game.current_level != number or game.world.tick >= len(replay):
+                game.play_replay(replay)
+        return before, frames
+    scenario.__name__ = f"level_{number + 1}"
+    return scenario
+
+
+def victory(game, frames):
+    game.start_game(seed=1, level=len(game.levels) - 1, record=False)
+    game.camera.update(game.player)
+    game.create_victory_particles()
+    game.state = "victory"
+    return None, min(frames, PARTICLE_LIFETIME - WARMUP_FRAMES)
+
+
+def measure(game, scenario, frames):
+    pygame.event.clear()
+    before, frames = scenario(game, frames)
+    for i in range(WARMUP_FRAMES):
+        if before:
+            before(i)
+        game.frame()
+    times = []
+    ticks = 0
+    skipped = game.skipped_ticks
+    for i in range(frames):
+        if before:
+            before(WARMUP_FRAMES + i)
+        world = getattr(game, "world", None)
+        tick = world.tick if world is not None else 0
+        start = time.perf_counter_ns()
+        game.frame()
+        times.append(time.perf_counter_ns() - start)
+        current = getattr(game, "world", None)
+        if current is not None:
+            ticks += current.tick - (tick if current is world else 0)
+    return times, ticks, game.skipped_ticks - skipped
+
+
+def measure_allocations(game, scenario):
+    pygame.event.clear()
+    before, frames = scenario(game, ALLOC_FRAMES)
+    for i in range(WARMUP_FRAMES):
+        if before:
+            before(i)
+        game.frame()
+    sizes = []
+    tracemalloc.start()
+    try:
+        for i in range(min(frames, ALLOC_FRAMES)):
+            if before:
+                before(WARMUP_FRAMES + i)
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            game.frame()
+            sizes.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(sizes) if sizes else 0
+
+
+def summarize(times, ticks, skipped, alloc_bytes):
+    cuts = statistics.quantiles(times, n=100, method="inclusive")
+    total = sum(times)
+    return {
+        "frames": len(times),
+        "mean_ms": total / len(times) / 1e6,
+        "p50_ms": cuts[49] / 1e6,
+        "p95_ms": cuts[94] / 1e6,
+        "p99_ms": cuts[98] / 1e6,
+        "max_ms": max(times) / 1e6,
+        "frames_per_sec": len(times) / (total / 1e9),
+        "world_ticks": ticks,
+        "ticks_per_sec": ticks / (total / 1e9),
+        "skipped_ticks": skipped,
+        "alloc_bytes_per_frame": alloc_bytes,
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {base[key]:.3f} -> {stats[key]:.3f} мс")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк кадров без окна")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--out", default="benchmark.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--scenario", action="append", help="запустить только указанные сценарии")
+    parser.add_argument("--render-scale", type=float, default=RENDER_SCALE)
+    parser.add_argument("--routes", default="routes", help="каталог маршрутов из validate_levels.py --save-routes")
+    args = parser.parse_args(argv)
+    if not 0 < args.render_scale <= 1:
+        parser.error("--render-scale должен быть больше 0 и не больше 1")
+
+    game = importlib.import_module("123").Game(AppContext(vsync=False, render_scale=args.render_scale))
+    game.frame_dt = 1 / TICK_RATE
+    game.app.finish_loading()
+    scenarios = [main_menu, settings] + [level(i, args.routes) for i in range(len(game.levels))] + [victory]
+    if args.scenario:
+        scenarios = [s for s in scenarios if s.__name__ in args.scenario]
+    volume = game.volume
+    results = {}
+    for scenario in scenarios:
+        times, ticks, skipped = measure(game, scenario, args.frames)
+        results[scenario.__name__] = summarize(times, ticks, skipped, measure_allocations(game, scenario))
+        stats = results[scenario.__name__]
+        print(f"{scenario.__name__:>10}: p50 {stats['p50_ms']:.3f} мс, p95 {stats['p95_ms']:.3f} мс, "
+              f"p99 {stats['p99_ms']:.3f} мс, {stats['frames_per_sec']:.0f} кадров/с, "
+              f"{stats['world_ticks']} тиков мира ({stats['ticks_per_sec']:.0f}/с), "
+              f"пропущено {stats['skipped_ticks']}, "
+              f"{stats['alloc_bytes_per_frame']:.0f} Б/кадр")
+    game.playback = None
+    game.volume = volume
+
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"Регрессия: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
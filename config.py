@@ -0,0 +1,23 @@
+WIDTH = 800
+HEIGHT = 700
+MAX_FPS = 240
+TICK_RATE = 75
+MAX_FRAME_SKIP = 5
+VSYNC = True
+RENDER_SCALE = 1.0
+
+WHITE = (255, 255, 255)
+BLUE = (0, 0, 255)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLACK = (0, 0, 0)
+GRAY = (150, 150, 150)
+YELLOW = (255, 255, 0)
+PURPLE = (128, 0, 128)
+
+PLAYER_SPEED = 5
+JUMP_POWER = -16.5
+GRAVITY = 0.45
+MAX_FALL_SPEED = 20
+JUMP_BUFFER_TICKS = 8
+COYOTE_TICKS = 6
@@ -0,0 +1,71 @@
+import time
+from collections import deque
+
+import pygame
+
+from replay import DECODE, LEFT, RIGHT, JUMP, RESPAWN
+
+REWIND = 16
+REPLAY_MASK = LEFT | RIGHT | JUMP | RESPAWN
+KEYMAP = {
+    pygame.K_a: LEFT,
+    pygame.K_LEFT: LEFT,
+    pygame.K_d: RIGHT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_SPACE: JUMP,
+    pygame.K_r: RESPAWN,
+    pygame.K_BACKSPACE: REWIND,
+}
+LATENCY_SAMPLES = 120
+
+
+class InputBuffer:
+    def __init__(self):
+        self.keys = set()
+        self.pressed = 0
+        self.press_times = []
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def reset(self):
+        keys = pygame.key.get_pressed()
+        self.keys = {key for key in KEYMAP if keys[key]}
+        self.pressed = 0
+        self.press_times.clear()
+
+    def handle(self, event):
+        if event.type == pygame.KEYDOWN:
+            bits = KEYMAP.get(event.key)
+            if bits:
+                self.keys.add(event.key)
+                self.pressed |= bits
+                if bits & REPLAY_MASK:
+                    self.press_times.append(time.perf_counter())
+        elif event.type == pygame.KEYUP:
+            self.keys.discard(event.key)
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            self.keys.clear()
+
+    def held(self):
+        bits = 0
+        for key in self.keys:
+            bits |= KEYMAP[key]
+        return bits
+
+    def next_tick(self):
+        bits = self.held() | self.pressed
+        self.pressed = 0
+        if self.press_times:
+            now = time.perf_counter()
+            self.latencies.extend(now - stamp for stamp in self.press_times)
+            self.press_times.clear()
+        return DECODE[bits & REPLAY_MASK]
+
+    def rewinding(self):
+        bits = self.held() | self.pressed
+        self.pressed &= ~REWIND
+        return bool(bits & REWIND)
+
+    def latency(self):
+        if not self.latencies:
+            return 0.0, 0.0
+        return sum(self.latencies) / len(self.latencies) * 1000, max(self.latencies) * 1000
@@ -0,0 +1,118 @@
+import random
+from collections import deque
+
+from config import HEIGHT, PLAYER_SPEED, JUMP_POWER, GRAVITY, MAX_FALL_SPEED
+from world import Level, Platform, MovingPlatform, Checkpoint, Lava
+
+CHUNK_WIDTH = 2048
+CHUNKS_AHEAD = 2
+CHUNKS_BEHIND = 1
+PLAYER_WIDTH = 30
+START_WIDTH = 800
+GROUND_HEIGHT = 40
+TOP_LIMIT = 300
+BOTTOM_LIMIT = 640
+JUMP_SAFETY = 0.75
+MOVER_CHANCE = 0.2
+LAVA_CHANCE = 0.3
+
+
+def jump_reach(rise):
+    y = apex = 0.0
+    velocity = JUMP_POWER
+    ticks = 0
+    while velocity <= 0 or y < -rise:
+        velocity = min(velocity + GRAVITY, MAX_FALL_SPEED)
+        y += velocity
+        apex = min(apex, y)
+        ticks += 1
+    return PLAYER_SPEED * ticks if apex <= -rise else 0
+
+
+def max_gap(rise):
+    return int(jump_reach(rise) * JUMP_SAFETY) + PLAYER_WIDTH
+
+
+class Chunk:
+    __slots__ = ("start", "end", "spawn", "entities")
+
+    def __init__(self, start, end, spawn, entities):
+        self.start = start
+        self.end = end
+        self.spawn = spawn
+        self.entities = entities
+
+
+class EndlessLevel:
+    def __init__(self, seed, world, layer):
+        self.rng = random.Random(seed)
+        self.world = world
+        self.layer = layer
+        self.chunks = deque()
+        self.next_x = 0
+        self.top = BOTTOM_LIMIT - GROUND_HEIGHT
+
+    @staticmethod
+    def level():
+        return Level(0, None, [], [], [], None)
+
+    def generate(self):
+        rng = self.rng
+        start = self.next_x
+        entities = []
+        x = start
+        if start == 0:
+            spawn = (100, HEIGHT // 2)
+            entities.append(Platform(0, self.top, START_WIDTH, GROUND_HEIGHT))
+            x = START_WIDTH
+        else:
+            spawn = (x + 20, self.top - 60)
+            entities.append(Checkpoint(*spawn))
+            x = self.add_platform(entities, x, rng.randint(200, 400))
+        while x < start + CHUNK_WIDTH:
+            if rng.random() < MOVER_CHANCE:
+                x = self.add_mover(entities, x)
+            else:
+                rise = rng.randint(-150, 120)
+                top = max(TOP_LIMIT, min(BOTTOM_LIMIT - GROUND_HEIGHT, self.top - rise))
+                rise = self.top - top
+                gap = rng.randint(PLAYER_WIDTH + 20, max(PLAYER_WIDTH + 20, max_gap(rise)))
+                self.top = top
+                x = self.add_platform(entities, x + gap, rng.randint(120, 420))
+        self.next_x = x
+        return Chunk(start, x, spawn, entities)
+
+    def add_platform(self, entities, x, width):
+        entities.append(Platform(x, self.top, width, GROUND_HEIGHT))
+        if width >= 300 and self.rng.random() < LAVA_CHANCE:
+            lava = self.rng.randint(40, 80)
+            entities.append(Lava(x + (width - lava) // 2, self.top - 20, lava, 20))
+        return x + width
+
+    def add_mover(self, entities, x):
+        width = 120
+        move_range = self.rng.randint(50, 100) * 4
+        edge = max_gap(0) // 3
+        entities.append(MovingPlatform(x + edge, self.top, width, GROUND_HEIGHT // 2, move_range))
+        return self.add_platform(entities, x + edge + move_range + width + edge, self.rng.randint(200, 400))
+
+    def update(self, x):
+        world = self.world
+        while self.next_x < x + CHUNK_WIDTH * CHUNKS_AHEAD:
+            chunk = self.generate()
+            for entity in chunk.entities:
+                world.add(entity)
+                if not isinstance(entity, (MovingPlatform, Checkpoint)):
+                    self.layer.invalidate(entity.rect)
+            self.chunks.append(chunk)
+        while len(self.chunks) > 1 and self.chunks[0].end < x - CHUNK_WIDTH * CHUNKS_BEHIND:
+            chunk = self.chunks.popleft()
+            for entity in chunk.entities:
+                world.remove(entity)
+                if not isinstance(entity, (MovingPlatform, Checkpoint)):
+                    self.layer.invalidate(entity.rect)
+            if world.player.checkpoint[0] < chunk.end:
+                world.player.checkpoint = self.chunks[0].spawn
+
+    def distance(self):
+        return self.world.player.rect.x
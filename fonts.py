@@ -0,0 +1,34 @@
+from collections import OrderedDict
+
+import pygame
+
+TEXT_CACHE_SIZE = 256
+
+_fonts = {}
+_text_cache = OrderedDict()
+
+
+def get_font(size, name=None):
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
+
+
+def render_text(text, size, color, antialias=True, name=None):
+    key = (name, size, text, color, antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+    surface = get_font(size, name).render(text, antialias, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
+
+
+def clear_text_cache():
+    _text_cache.clear()
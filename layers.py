@@ -0,0 +1,71 @@
+import math
+from collections import OrderedDict
+
+import pygame
+
+from config import WIDTH, HEIGHT
+
+TILE_SIZE = 256
+TILE_CACHE = 64
+COLORKEY = (255, 0, 255)
+
+
+class StaticLayer:
+    def __init__(self, query, tile_size=TILE_SIZE, capacity=TILE_CACHE, scale=1):
+        self.query = query
+        self.tile_size = tile_size
+        self.capacity = capacity
+        self.scale = scale
+        self.tiles = OrderedDict()
+
+    def keys(self, rect):
+        size = self.tile_size
+        return [(tx, ty) for tx in range(rect.left // size, (rect.right - 1) // size + 1)
+                for ty in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def tile(self, key):
+        tiles = self.tiles
+        if key in tiles:
+            tiles.move_to_end(key)
+            return tiles[key]
+        tile = tiles[key] = self.bake(key)
+        if len(tiles) > self.capacity:
+            tiles.popitem(last=False)
+        return tile
+
+    def bake(self, key):
+        size = self.tile_size
+        area = pygame.Rect(key[0] * size, key[1] * size, size, size)
+        sprites = self.query(area)
+        if not sprites:
+            return None
+        scale = self.scale
+        pixels = int(size * scale)
+        tile = pygame.Surface((pixels, pixels))
+        if pygame.display.get_surface() is not None:
+            tile = tile.convert()
+        tile.fill(COLORKEY)
+        tile.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        for sprite in sprites:
+            pos = (math.floor((sprite.rect.x - area.x) * scale), math.floor((sprite.rect.y - area.y) * scale))
+            sprite.draw(tile, pos, scale)
+        return tile
+
+    def baking(self, rect):
+        for key in self.keys(rect):
+            if key not in self.tiles:
+                self.tile(key)
+                yield
+
+    def invalidate(self, rect):
+        for key in self.keys(rect):
+            self.tiles.pop(key, None)
+
+    def draw(self, surface, camera):
+        size = self.tile_size
+        scale = self.scale
+        ox, oy = camera.camera.topleft
+        for tx, ty in self.keys(pygame.Rect(-ox, -oy, WIDTH, HEIGHT)):
+            tile = self.tile((tx, ty))
+            if tile is not None:
+                surface.blit(tile, (math.floor((tx * size + ox) * scale), math.floor((ty * size + oy) * scale)))
@@ -0,0 +1,133 @@
+import glob
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import namedtuple
+
+from world import Level, Platform, MovingPlatform, Checkpoint, Lava
+
+LEVELS_DIR = "levels"
+CACHE_MAGIC = b"LVL1"
+HEADER = struct.Struct("<4s20siiii4I")
+BUILD_CHUNK = 64
+
+LevelData = namedtuple("LevelData", ["number", "width", "platforms", "moving_platforms", "checkpoints", "lava",
+                                     "finish"])
+
+FIELDS = (("platforms", 4), ("moving_platforms", 5), ("checkpoints", 4), ("lava", 4))
+
+
+def level_paths(directory=LEVELS_DIR):
+    paths = glob.glob(os.path.join(directory, "level*.json"))
+    return sorted(paths, key=lambda p: int(os.path.basename(p)[5:-5]))
+
+
+def parse_level(source):
+    raw = json.loads(source)
+    checkpoints = [tuple(c) if len(c) == 4 else (c[0], c[1], 40, 60) for c in raw.get("checkpoints", [])]
+    return LevelData(raw["number"], raw["width"],
+                     [tuple(p) for p in raw.get("platforms", [])],
+                     [tuple(p) for p in raw.get("moving_platforms", [])],
+                     checkpoints,
+                     [tuple(p) for p in raw.get("lava", [])],
+                     tuple(raw["finish"]))
+
+
+def pack_level(data, digest):
+    values = array("i")
+    counts = []
+    for field, size in FIELDS:
+        rows = getattr(data, field)
+        counts.append(len(rows))
+        for row in rows:
+            values.extend(row)
+    header = HEADER.pack(CACHE_MAGIC, digest, data.number, data.width, data.finish[0], data.finish[1], *counts)
+    return header + values.tobytes()
+
+
+def unpack_level(blob, digest):
+    if len(blob) < HEADER.size:
+        return None
+    magic, stored, number, width, fx, fy, *counts = HEADER.unpack_from(blob)
+    if magic != CACHE_MAGIC or stored != digest:
+        return None
+    if len(blob) != HEADER.size + 4 * sum(count * size for (_, size), count in zip(FIELDS, counts)):
+        return None
+    values = array("i")
+    values.frombytes(blob[HEADER.size:])
+    rows = {}
+    offset = 0
+    for (field, size), count in zip(FIELDS, counts):
+        end = offset + count * size
+        rows[field] = list(zip(*[iter(values[offset:end])] * size))
+        offset = end
+    return LevelData(number, width, rows["platforms"], rows["moving_platforms"], rows["checkpoints"], rows["lava"],
+                     (fx, fy))
+
+
+def cache_path(path):
+    return os.path.join(os.path.dirname(path), ".cache", os.path.basename(path)[:-5] + ".bin")
+
+
+def read_level_data(path):
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha1(source).digest()
+    cached = cache_path(path)
+    try:
+        with open(cached, "rb") as f:
+            data = unpack_level(f.read(), digest)
+        if data is not None:
+            return data
+    except OSError:
+        pass
+    data = parse_level(source)
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        temp = f"{cached}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(pack_level(data, digest))
+        os.replace(temp, cached)
+    except OSError as e:
+        print(f"Не удалось сохранить кэш уровня {path}: {e}")
+    return data
+
+
+def building(data, chunk=BUILD_CHUNK):
+    groups = []
+    for kind, rows in ((Platform, data.platforms), (MovingPlatform, data.moving_platforms),
+                       (Checkpoint, data.checkpoints), (Lava, data.lava)):
+        entities = []
+        for row in rows:
+            entities.append(kind(*row))
+            if len(entities) % chunk == 0:
+                yield
+        groups.append(entities)
+    platforms, moving_platforms, checkpoints, lava = groups
+    return Level(data.number, data.width, platforms + moving_platforms, checkpoints, lava, data.finish)
+
+
+def build_level(data):
+    builder = building(data)
+    while True:
+        try:
+            next(builder)
+        except StopIteration as done:
+            return done.value
+
+
+def read_level(path):
+    return build_level(read_level_data(path))
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:] or level_paths():
+        start = time.perf_counter()
+        data = read_level_data(path)
+        elapsed = (time.perf_counter() - start) * 1000
+        count = sum(len(getattr(data, field)) for field, _ in FIELDS)
+        print(f"{path}: {count} объектов, {elapsed:.2f} мс")
@@ -0,0 +1,70 @@
+import numpy as np
+
+PARTICLE_CAPACITY = 8192
+PARTICLE_GRAVITY = 0.3
+PARTICLE_LIFETIME = 150
+
+
+class ParticleEmitter:
+    def __init__(self, image, capacity=PARTICLE_CAPACITY, gravity=PARTICLE_GRAVITY, lifetime=PARTICLE_LIFETIME):
+        self.image = image
+        self.half = np.array(image.get_size(), dtype=np.float32) / 2
+        self.capacity = capacity
+        self.gravity = gravity
+        self.lifetime = lifetime
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.count = 0
+        self.rng = np.random.default_rng()
+
+    def set_image(self, image):
+        self.image = image
+        self.half = np.array(image.get_size(), dtype=np.float32) / 2
+
+    def emit(self, pos, count, dx_range, dy_range, rng=None):
+        rng = rng if rng is not None else self.rng
+        start = self.count
+        count = min(count, self.capacity - start)
+        if count <= 0:
+            return
+        end = start + count
+        self.pos[start:end] = pos
+        self.vel[start:end, 0] = rng.integers(dx_range[0], dx_range[1] + 1, count)
+        self.vel[start:end, 1] = rng.integers(dy_range[0], dy_range[1] + 1, count)
+        self.age[start:end] = 0
+        self.count = end
+
+    def update(self):
+        count = self.count
+        if not count:
+            return
+        vel = self.vel[:count]
+        vel[:, 1] += self.gravity
+        self.pos[:count] += vel
+        age = self.age[:count]
+        age += 1
+        alive = age < self.lifetime
+        if not alive.all():
+            alive_count = int(alive.sum())
+            self.pos[:alive_count] = self.pos[:count][alive]
+            self.vel[:alive_count] = vel[alive]
+            self.age[:alive_count] = age[alive]
+            self.count = alive_count
+
+    def draw(self, surface, offset, scale=1):
+        count = self.count
+        if not count:
+            return
+        coords = self.pos[:count] + np.array(offset, dtype=np.float32)
+        if scale != 1:
+            coords *= scale
+        coords = (coords - self.half).astype(np.int32).tolist()
+        image = self.image
+        surface.blits([(image, xy) for xy in coords], doreturn=False)
+
+    def clear(self):
+        self.count = 0
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,100 @@
+import csv
+import json
+import os
+import time
+from time import perf_counter_ns
+
+from config import TICK_RATE
+
+PHASES = ("events", "background", "physics", "collide_platforms", "collide_checkpoints", "collide_lava",
+          "level_switch", "sprites", "particles", "prewarm", "ui", "flip")
+PROFILE_CAPACITY = 900
+PROFILES_DIR = "profiles"
+
+
+class FrameProfiler:
+    def __init__(self, capacity=PROFILE_CAPACITY, phases=PHASES, fps=0):
+        self.capacity = capacity
+        self.fps = fps or TICK_RATE
+        self.budget = 1_000_000_000 // self.fps
+        self.phases = phases
+        self.slots = {name: i for i, name in enumerate(phases)}
+        self.rows = [[0] * len(phases) for _ in range(capacity)]
+        self.starts = [0] * capacity
+        self.totals = [0] * capacity
+        self.head = 0
+        self.count = 0
+        self.row = self.rows[0]
+        self.frame_start = 0
+        self.last = 0
+
+    def begin_frame(self):
+        row = self.rows[self.head]
+        for i in range(len(row)):
+            row[i] = 0
+        self.row = row
+        self.frame_start = self.last = perf_counter_ns()
+
+    def mark(self, phase):
+        now = perf_counter_ns()
+        self.row[self.slots[phase]] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        head = self.head
+        self.starts[head] = self.frame_start
+        self.totals[head] = perf_counter_ns() - self.frame_start
+        self.head = (head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def recent(self, window=None):
+        window = min(window or self.count, self.count)
+        return [(self.head - 1 - i) % self.capacity for i in range(window)][::-1]
+
+    def averages(self, window=None):
+        indices = self.recent(window)
+        if not indices:
+            return {name: 0.0 for name in self.phases}
+        return {name: sum(self.rows[i][slot] for i in indices) / len(indices) / 1e6
+                for name, slot in self.slots.items()}
+
+    def worst(self, count=3, window=None):
+        indices = sorted(self.recent(window), key=self.totals.__getitem__, reverse=True)[:count]
+        result = []
+        for i in indices:
+            row = self.rows[i]
+            phase = self.phases[max(range(len(row)), key=row.__getitem__)]
+            result.append((self.totals[i] / 1e6, phase, row[self.slots[phase]] / 1e6))
+        return result
+
+    def over_budget(self, window=None):
+        return sum(1 for i in self.recent(window) if self.totals[i] > self.budget)
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame", "total_ms") + tuple(f"{name}_ms" for name in self.phases))
+            for n, i in enumerate(self.recent()):
+                writer.writerow([n, self.totals[i] / 1e6] + [value / 1e6 for value in self.rows[i]])
+
+    def export_chrome_trace(self, path):
+        events = []
+        indices = self.recent()
+        origin = self.starts[indices[0]] if indices else 0
+        for n, i in enumerate(indices):
+            ts = (self.starts[i] - origin) / 1000
+            events.append({"name": "frame", "ph": "X", "ts": ts, "dur": self.totals[i] / 1000,
+                           "pid": 1, "tid": 1, "args": {"frame": n}})
+            for name, value in zip(self.phases, self.rows[i]):
+                if value:
+                    events.append({"name": name, "ph": "X", "ts": ts, "dur": value / 1000, "pid": 1, "tid": 2})
+                    ts += value / 1000
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, directory=PROFILES_DIR):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, "frames-" + time.strftime("%Y%m%d-%H%M%S"))
+        self.export_csv(base + ".csv")
+        self.export_chrome_trace(base + ".json")
+        return base
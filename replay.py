@@ -0,0 +1,121 @@
+import argparse
+import importlib
+import os
+import struct
+import sys
+import time
+import zlib
+
+from level_loader import level_paths, read_level
+from world import Inputs, World
+
+REPLAY_MAGIC = b"RPL1"
+HEADER = struct.Struct("<4sIQII")
+CHECKSUM = struct.Struct("<iiiidii")
+REPLAYS_DIR = "replays"
+
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+RESPAWN = 8
+
+DECODE = [Inputs(bool(bits & LEFT), bool(bits & RIGHT), bool(bits & JUMP), bool(bits & RESPAWN))
+          for bits in range(16)]
+
+
+def encode_inputs(inputs):
+    return ((LEFT if inputs.left else 0) | (RIGHT if inputs.right else 0) |
+            (JUMP if inputs.jump else 0) | (RESPAWN if inputs.respawn else 0))
+
+
+def state_checksum(level, state):
+    if state is None:
+        return 0
+    return zlib.crc32(CHECKSUM.pack(level, state.tick, state.x, state.y, state.velocity, *state.checkpoint))
+
+
+class Replay:
+    def __init__(self, level, seed, frames=b"", checksum=0):
+        self.level = level
+        self.seed = seed
+        self.frames = bytearray(frames)
+        self.checksum = checksum
+
+    def record(self, inputs):
+        self.frames.append(encode_inputs(inputs))
+
+    def inputs(self):
+        return (DECODE[bits] for bits in self.frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def to_bytes(self):
+        return HEADER.pack(REPLAY_MAGIC, self.level, self.seed, len(self.frames), self.checksum) + \
+            zlib.compress(bytes(self.frames), 9)
+
+    @classmethod
+    def from_bytes(cls, blob):
+        magic, level, seed, count, checksum = HEADER.unpack_from(blob)
+        if magic != REPLAY_MAGIC:
+            raise ValueError("Неизвестный формат повтора")
+        frames = zlib.decompress(blob[HEADER.size:])
+        if len(frames) != count:
+            raise ValueError("Повреждённый файл повтора")
+        return cls(level, seed, frames, checksum)
+
+    def save(self, path=None):
+        if path is None:
+            os.makedirs(REPLAYS_DIR, exist_ok=True)
+            path = os.path.join(REPLAYS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".rpl")
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def play(replay, paths=None):
+    paths = paths or level_paths()
+    level = replay.level
+    world = World(read_level(paths[level]))
+    state = None
+    for inputs in replay.inputs():
+        state = world.step(inputs)
+        if state.finished:
+            if level + 1 >= len(paths):
+                break
+            level += 1
+            world = World(read_level(paths[level]))
+    return level, state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Воспроизведение записанной сессии")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="скорость воспроизведения с отрисовкой; без флага - без окна на максимальной скорости")
+    args = parser.parse_args(argv)
+    replay = Replay.load(args.path)
+    if args.speed is not None:
+        game = importlib.import_module("123").Game()
+        game.play_replay(replay, args.speed)
+        game.run()
+        return 0
+    start = time.perf_counter()
+    level, state = play(replay)
+    elapsed = time.perf_counter() - start
+    checksum = state_checksum(level, state)
+    print(f"Тиков: {len(replay)}, уровень: {level + 1}, время: {elapsed:.3f} с "
+          f"({len(replay) / max(elapsed, 1e-9):.0f} тиков/с)")
+    if replay.checksum and checksum != replay.checksum:
+        print(f"Расхождение: ожидалось {replay.checksum:08x}, получено {checksum:08x}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
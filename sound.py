@@ -1,12 +1,94 @@
 import pygame
 
-pygame.mixer.init()
-jump_sound = pygame.mixer.Sound('music/jump.mp3')
+MUSIC_PATH = 'music/фон.mp3'
+EFFECTS = {
+    "jump": 'music/jump.mp3',
+}
+SFX_CHANNELS = 8
+
+
+class AudioEngine:
+    def __init__(self, channels=SFX_CHANNELS):
+        self.size = channels
+        self.channels = []
+        self.started = []
+        self.sounds = {}
+        self.counter = 0
+        self.master = 1.0
+        self.music = 1.0
+        self.sfx = 1.0
+
+    def init(self):
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(buffer=512)
+            if pygame.mixer.get_num_channels() < self.size:
+                pygame.mixer.set_num_channels(self.size)
+            pygame.mixer.set_reserved(self.size)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.size)]
+            self.started = [0] * self.size
+            for name, path in EFFECTS.items():
+                self.sounds[name] = pygame.mixer.Sound(path)
+        except pygame.error as e:
+            print(f"Ошибка инициализации звука: {e}")
+        self.apply_volume()
+
+    def ready(self):
+        return bool(self.channels) and pygame.mixer.get_init() is not None
+
+    def set_volume(self, master=None, music=None, sfx=None):
+        if master is not None:
+            self.master = master
+        if music is not None:
+            self.music = music
+        if sfx is not None:
+            self.sfx = sfx
+        self.apply_volume()
+
+    def apply_volume(self):
+        if not pygame.mixer.get_init():
+            return
+        pygame.mixer.music.set_volume(self.master * self.music)
+        for sound in self.sounds.values():
+            sound.set_volume(self.master * self.sfx)
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is None or not self.ready():
+            return
+        index = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                index = i
+                break
+        if index is None:
+            index = self.started.index(min(self.started))
+        self.counter += 1
+        self.started[index] = self.counter
+        self.channels[index].play(sound)
+
+    def play_music(self, path=MUSIC_PATH):
+        if not pygame.mixer.get_init():
+            return
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.play(-1)
+        except pygame.error as e:
+            print(f"Ошибка загрузки музыки: {e}")
+        self.apply_volume()
+
+
+engine = AudioEngine()
+
+
+def init_audio():
+    engine.init()
 
 def bg_music():
-    pygame.mixer.music.load('music/фон.mp3')
-    pygame.mixer.music.play(-1)
+    engine.play_music()
 
 def jump():
-    jump = pygame.mixer.Sound('music/jump.mp3')
-    jump.play()
\ No newline at end of file
+    engine.play("jump")
+
+def set_volume(master=None, music=None, sfx=None):
+    engine.set_volume(master, music, sfx)
@@ -0,0 +1,76 @@
+from operator import attrgetter
+
+CELL_SIZE = 128
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE, rect_of=attrgetter("rect")):
+        self.cell_size = cell_size
+        self.rect_of = rect_of
+        self.cells = {}
+        self.entries = {}
+        self.order = 0
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, entity):
+        bounds = self.cell_range(self.rect_of(entity))
+        self.entries[entity] = (self.order, bounds)
+        self.order += 1
+        self._add(entity, bounds)
+
+    def remove(self, entity):
+        entry = self.entries.pop(entity, None)
+        if entry is not None:
+            self._discard(entity, entry[1])
+
+    def move(self, entity):
+        order, bounds = self.entries[entity]
+        new_bounds = self.cell_range(self.rect_of(entity))
+        if new_bounds != bounds:
+            self._discard(entity, bounds)
+            self._add(entity, new_bounds)
+            self.entries[entity] = (order, new_bounds)
+
+    def query(self, rect):
+        x0, y0, x1, y1 = self.cell_range(rect)
+        cells = self.cells
+        rect_of = self.rect_of
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for entity in bucket:
+                        if entity not in found and rect.colliderect(rect_of(entity)):
+                            found[entity] = self.entries[entity][0]
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=found.get)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _add(self, entity, bounds):
+        x0, y0, x1, y1 = bounds
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [entity]
+                else:
+                    bucket.append(entity)
+
+    def _discard(self, entity, bounds):
+        x0, y0, x1, y1 = bounds
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells[(cx, cy)]
+                bucket.remove(entity)
+                if not bucket:
+                    del cells[(cx, cy)]
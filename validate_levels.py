@@ -0,0 +1,218 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from config import TICK_RATE
+from level_loader import level_paths, read_level
+from replay import DECODE, LEFT, RIGHT, JUMP, Replay, state_checksum
+from world import World
+
+MAX_TICKS = TICK_RATE * 60
+RANDOM_ATTEMPTS = 20
+SEARCH_ROUNDS = 150
+SEARCH_PATIENCE = 20
+JOB_BUDGET = 5.0
+STALL_TICKS = TICK_RATE * 8
+SAVE_TICKS = TICK_RATE
+
+Result = namedtuple("Result", ["path", "strategy", "finish_tick", "distance", "closest_tick", "checkpoints",
+                               "route", "state"])
+
+MACROS = (RIGHT, RIGHT, RIGHT | JUMP, RIGHT | JUMP, LEFT, LEFT | JUMP, JUMP, 0)
+
+
+class Course:
+    def __init__(self, path):
+        self.path = path
+        self.world = World(read_level(path))
+        self.origin = self.world.snapshot()
+        self.target = self.world.finish_rect.center
+
+    def simulate(self, frames, max_ticks=MAX_TICKS, stall_ticks=STALL_TICKS, saves=(), start=0):
+        world = self.world
+        target = self.target
+        saves = [save for save in saves if save[0] <= start]
+        tick, blob, best, closest_tick = saves[-1] if saves else (0, self.origin, math.inf, 0)
+        world.restore(blob)
+        route = bytearray()
+        if tick:
+            route.extend(frames[:tick])
+            frames = frames[tick:]
+        finish_tick = None
+        state = None
+        for bits in frames:
+            state = world.step(DECODE[bits])
+            route.append(bits)
+            rect = world.player.rect
+            distance = math.hypot(rect.centerx - target[0], rect.centery - target[1])
+            if distance < best:
+                best = distance
+                closest_tick = state.tick
+            if state.finished:
+                finish_tick = closest_tick = state.tick
+                best = 0.0
+                break
+            if state.tick >= max_ticks or state.tick - closest_tick > stall_ticks:
+                break
+            if state.tick % SAVE_TICKS == 0:
+                saves.append((state.tick, world.snapshot(), best, closest_tick))
+        checkpoints = frozenset(i for i, c in enumerate(world.level.checkpoints) if c.active)
+        return Result(self.path, None, finish_tick, best, closest_tick, checkpoints, bytes(route), state), saves
+
+
+def simulate(path, frames, max_ticks=MAX_TICKS, stall_ticks=STALL_TICKS):
+    return Course(path).simulate(frames, max_ticks, stall_ticks)[0]
+
+
+def score(result):
+    if result.finish_tick is not None:
+        return 0, result.finish_tick
+    return 1, result.distance
+
+
+def scripted_frames(period, max_ticks=MAX_TICKS):
+    for tick in range(max_ticks):
+        yield RIGHT | JUMP if period == 0 or tick % period == 0 else RIGHT
+
+
+def random_frames(rng, max_ticks=MAX_TICKS):
+    frames = bytearray()
+    while len(frames) < max_ticks:
+        frames.extend([rng.choice(MACROS)] * rng.randint(3, 40))
+    return bytes(frames[:max_ticks])
+
+
+def mutate(rng, result, max_ticks=MAX_TICKS):
+    frames = bytearray(result.route)
+    if result.finish_tick is not None:
+        start = rng.randrange(len(frames))
+        length = rng.randint(5, 80)
+        frames[start:start + length] = bytes([rng.choice(MACROS)]) * rng.randint(3, 80)
+    else:
+        start = rng.randint(max(0, result.closest_tick - TICK_RATE * 2), result.closest_tick)
+        del frames[start:]
+    if len(frames) < max_ticks:
+        frames.extend(random_frames(rng, max_ticks - len(frames)))
+    return start, bytes(frames[:max_ticks])
+
+
+def limit(best):
+    if best is not None and best.finish_tick is not None:
+        return best.finish_tick
+    return MAX_TICKS
+
+
+def merge(best, result):
+    checkpoints = best.checkpoints | result.checkpoints if best else result.checkpoints
+    if best is None or score(result) < score(best):
+        best = result
+    return best._replace(checkpoints=checkpoints)
+
+
+def settled(result, total):
+    return result.finish_tick is not None and len(result.checkpoints) == total
+
+
+def run_job(job):
+    path, strategy, seed, exhaustive, budget = job
+    rng = random.Random(seed)
+    course = Course(path)
+    deadline = time.perf_counter() + budget if budget else None
+    best = None
+    saves = []
+    idle = 0
+
+    def stop():
+        if exhaustive:
+            return False
+        if deadline is not None and time.perf_counter() > deadline:
+            return True
+        return best.finish_tick is not None and idle >= SEARCH_PATIENCE
+
+    def attempt(frames, stall_ticks=STALL_TICKS, start=0):
+        nonlocal best, saves, idle
+        result, result_saves = course.simulate(frames, limit(best), stall_ticks, saves, start)
+        if best is None or score(result) < score(best):
+            saves = result_saves
+            idle = 0
+        else:
+            idle += 1
+        best = merge(best, result)
+
+    if strategy == "scripted":
+        for period in range(0, 60, 3):
+            attempt(scripted_frames(period), MAX_TICKS)
+    elif strategy == "random":
+        for _ in range(RANDOM_ATTEMPTS):
+            attempt(random_frames(rng))
+            if stop():
+                break
+    else:
+        attempt(random_frames(rng))
+        for _ in range(SEARCH_ROUNDS):
+            start, frames = mutate(rng, best)
+            attempt(frames, start=start)
+            if stop():
+                break
+    return best._replace(strategy=strategy)
+
+
+def validate(paths, seeds=4, workers=None, exhaustive=False, budget=JOB_BUDGET):
+    totals = {path: len(read_level(path).checkpoints) for path in paths}
+    best = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(run_job, [(path, "scripted", 0, exhaustive, budget) for path in paths]):
+            best[result.path] = result
+        pending = [path for path in paths if exhaustive or not settled(best[path], totals[path])]
+        jobs = [(path, strategy, seed, exhaustive, budget)
+                for path in pending for strategy in ("random", "search") for seed in range(seeds)]
+        for result in pool.map(run_job, jobs):
+            best[result.path] = merge(best.get(result.path), result)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка проходимости уровней")
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--seeds", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--save-routes", metavar="DIR", help="сохранить самые быстрые маршруты как повторы")
+    parser.add_argument("--exhaustive", action="store_true",
+                        help="искать самый быстрый маршрут всеми стратегиями без ранней остановки")
+    parser.add_argument("--budget", type=float, default=JOB_BUDGET,
+                        help="ограничение времени одной задачи в секундах, 0 - без ограничения")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or level_paths()
+    start = time.perf_counter()
+    results = validate(paths, args.seeds, args.workers, args.exhaustive, args.budget)
+    elapsed = time.perf_counter() - start
+    known = [os.path.normpath(p) for p in level_paths()]
+    failed = False
+    for path in paths:
+        result = results[path]
+        total = len(read_level(path).checkpoints)
+        checkpoints = f"чекпоинты {len(result.checkpoints)}/{total}"
+        if result.finish_tick is None:
+            failed = True
+            print(f"{path}: финиш НЕ достигнут (ближе всего {result.distance:.0f} px), {checkpoints}")
+            continue
+        print(f"{path}: финиш за {result.finish_tick} тиков ({result.finish_tick / TICK_RATE:.1f} с, "
+              f"{result.strategy}), {checkpoints}")
+        if args.save_routes and os.path.normpath(path) in known:
+            os.makedirs(args.save_routes, exist_ok=True)
+            name = os.path.splitext(os.path.basename(path))[0] + ".rpl"
+            level = known.index(os.path.normpath(path))
+            checksum = state_checksum(min(level + 1, len(known) - 1), result.state)
+            Replay(level, 0, result.route, checksum).save(os.path.join(args.save_routes, name))
+    print(f"Проверено уровней: {len(paths)} за {elapsed:.1f} с")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,417 @@
+import struct
+from collections import namedtuple
+
+from operator import attrgetter
+
+import pygame
+
+from spatial import SpatialHash
+from config import (WIDTH, HEIGHT, PLAYER_SPEED, JUMP_POWER, GRAVITY, MAX_FALL_SPEED, JUMP_BUFFER_TICKS, COYOTE_TICKS,
+                    BLUE, RED, GREEN, YELLOW)
+
+Inputs = namedtuple("Inputs", ["left", "right", "jump", "respawn"], defaults=(False, False, False, False))
+NO_INPUTS = Inputs()
+
+ACTIVE_MARGIN_X = WIDTH
+ACTIVE_MARGIN_Y = HEIGHT
+FILL_CHUNK = 64
+
+SNAPSHOT_MAGIC = b"SNP1"
+SNAPSHOT_HEADER = struct.Struct("<4sIiiidBBBhiiHH")
+SNAPSHOT_MOVER = struct.Struct("<ibI")
+
+PALETTE = (GREEN, RED, YELLOW, (0, 255, 0))
+PLATFORM_COLOR, LAVA_COLOR, CHECKPOINT_COLOR, ACTIVE_CHECKPOINT_COLOR = range(len(PALETTE))
+
+State = namedtuple("State", ["tick", "x", "y", "velocity", "on_ground", "checkpoint", "jumped", "died", "finished",
+                             "activated"])
+
+
+class Player(pygame.sprite.Sprite):
+    def __init__(self, color=BLUE):
+        super().__init__()
+        self.image = pygame.Surface((30, 50))
+        self.image.fill(color)
+        self.color = color
+        self.rect = self.image.get_rect(center=(100, HEIGHT // 2))
+        self.velocity = 0
+        self.on_ground = False
+        self.checkpoint = (100, HEIGHT // 2)
+        self.jumped = False
+        self.ground = None
+        self.jump_buffer = 0
+        self.air_ticks = COYOTE_TICKS + 1
+        self.prev_pos = self.rect.topleft
+
+    def update_color(self, color):
+        self.image.fill(color)
+        self.color = color
+
+    def draw(self, surface, pos, scale=1):
+        if scale == 1:
+            surface.blit(self.image, pos)
+        else:
+            size = (round(self.rect.width * scale), round(self.rect.height * scale))
+            surface.fill(self.color, surface.get_rect().clip(pos, size))
+
+    def update(self, inputs=NO_INPUTS, dt=1):
+        self.prev_pos = self.rect.topleft
+        self.jumped = False
+        dx = 0
+        if inputs.left:
+            dx -= PLAYER_SPEED * dt
+        if inputs.right:
+            dx += PLAYER_SPEED * dt
+        if inputs.jump:
+            self.jump_buffer = JUMP_BUFFER_TICKS
+        if self.jump_buffer > 0 and self.air_ticks <= COYOTE_TICKS:
+            self.velocity = JUMP_POWER
+            self.on_ground = False
+            self.ground = None
+            self.jumped = True
+            self.jump_buffer = 0
+            self.air_ticks = COYOTE_TICKS + 1
+        else:
+            self.jump_buffer = max(0, self.jump_buffer - dt)
+        if inputs.respawn:
+            self.respawn()
+        self.velocity = min(self.velocity + GRAVITY * dt, MAX_FALL_SPEED)
+        return dx, self.velocity * dt
+
+    def respawn(self):
+        self.rect.topleft = self.checkpoint
+        self.prev_pos = self.checkpoint
+        self.velocity = 0
+        self.on_ground = False
+        self.ground = None
+        self.jump_buffer = 0
+        self.air_ticks = COYOTE_TICKS + 1
+
+
+class Block:
+    __slots__ = ("rect", "color")
+
+    def __init__(self, x, y, width, height, color):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.color = color
+
+    def draw(self, surface, pos, scale=1):
+        size = self.rect.size if scale == 1 else (round(self.rect.width * scale), round(self.rect.height * scale))
+        surface.fill(PALETTE[self.color], surface.get_rect().clip(pos, size))
+
+
+class Platform(Block):
+    __slots__ = ()
+
+    def __init__(self, x, y, width, height):
+        super().__init__(x, y, width, height, PLATFORM_COLOR)
+
+
+class MovingPlatform(Platform):
+    __slots__ = ("move_range", "direction", "speed", "start_x", "tick", "prev_pos", "turn", "travel_rect")
+
+    def __init__(self, x, y, width, height, move_range, speed=4):
+        super().__init__(x, y, width, height)
+        self.move_range = move_range
+        self.direction = 1
+        self.speed = speed
+        self.start_x = x
+        self.tick = 0
+        self.prev_pos = (x, y)
+        self.turn = move_range // speed + 2
+        self.travel_rect = pygame.Rect(x - speed, y, width + speed * self.turn, height)
+
+    def update(self):
+        self.rect.x += self.direction * self.speed
+        if self.rect.x > self.start_x + self.move_range or self.rect.x < self.start_x:
+            self.direction *= -1
+
+    def sync(self, tick):
+        phase = (tick + 1) % (2 * self.turn)
+        if phase < self.turn:
+            self.rect.x = self.start_x + self.speed * (phase - 1)
+            self.direction = 1
+        else:
+            self.rect.x = self.start_x + self.speed * (2 * self.turn - phase - 1)
+            self.direction = -1
+
+    def advance(self, tick):
+        if tick == self.tick + 1:
+            self.prev_pos = self.rect.topleft
+            self.update()
+        else:
+            self.sync(tick)
+            self.prev_pos = self.rect.topleft
+        self.tick = tick
+
+
+class Checkpoint(Block):
+    __slots__ = ("active",)
+
+    def __init__(self, x, y, width=40, height=60):
+        super().__init__(x, y, width, height, CHECKPOINT_COLOR)
+        self.active = False
+
+    def activate(self):
+        if not self.active:
+            self.color = ACTIVE_CHECKPOINT_COLOR
+            self.active = True
+            return True
+        return False
+
+    def deactivate(self):
+        self.color = CHECKPOINT_COLOR
+        self.active = False
+
+
+class Lava(Block):
+    __slots__ = ("active",)
+
+    def __init__(self, x, y, width=40, height=60):
+        super().__init__(x, y, width, height, LAVA_COLOR)
+        self.active = False
+
+    def death(self):
+        if not self.active:
+            self.active = True
+
+
+class Level:
+    def __init__(self, number, width, platforms, checkpoints, damage_platforms, finish_point):
+        self.number = number
+        self.width = width
+        self.platforms = platforms
+        self.checkpoints = checkpoints
+        self.damage_platforms = damage_platforms
+        self.finish_point = finish_point
+
+
+class World:
+    def __init__(self, level, player=None, fill=True):
+        self.level = level
+        self.tick = 0
+        self.profiler = None
+        self.platforms = []
+        self.checkpoints = []
+        self.damage_platforms = []
+        self.movers = []
+        self.platform_index = SpatialHash()
+        self.mover_index = SpatialHash(rect_of=attrgetter("travel_rect"))
+        self.checkpoint_index = SpatialHash()
+        self.damage_index = SpatialHash()
+        self.player = player if player is not None else Player()
+        if fill:
+            for _ in self.filling():
+                pass
+        if level.finish_point is not None:
+            self.finish_rect = pygame.Rect(*level.finish_point, 40, 60)
+        else:
+            self.finish_rect = pygame.Rect(0, 0, 0, 0)
+        self.player.checkpoint = (100, HEIGHT // 2)
+        self.player.respawn()
+
+    def filling(self, chunk=FILL_CHUNK):
+        level = self.level
+        for i, entity in enumerate(level.platforms + level.checkpoints + level.damage_platforms, 1):
+            self.insert(entity)
+            if i % chunk == 0:
+                yield
+
+    def insert(self, entity):
+        if isinstance(entity, Checkpoint):
+            self.checkpoints.append(entity)
+            self.checkpoint_index.insert(entity)
+        elif isinstance(entity, Lava):
+            self.damage_platforms.append(entity)
+            self.damage_index.insert(entity)
+        else:
+            self.platforms.append(entity)
+            self.platform_index.insert(entity)
+            if isinstance(entity, MovingPlatform):
+                self.movers.append(entity)
+                self.mover_index.insert(entity)
+
+    def add(self, entity):
+        if isinstance(entity, Checkpoint):
+            self.level.checkpoints.append(entity)
+        elif isinstance(entity, Lava):
+            self.level.damage_platforms.append(entity)
+        else:
+            self.level.platforms.append(entity)
+        self.insert(entity)
+
+    def remove(self, entity):
+        if isinstance(entity, Checkpoint):
+            self.level.checkpoints.remove(entity)
+            self.checkpoints.remove(entity)
+            self.checkpoint_index.remove(entity)
+        elif isinstance(entity, Lava):
+            self.level.damage_platforms.remove(entity)
+            self.damage_platforms.remove(entity)
+            self.damage_index.remove(entity)
+        else:
+            self.level.platforms.remove(entity)
+            self.platforms.remove(entity)
+            self.platform_index.remove(entity)
+            if isinstance(entity, MovingPlatform):
+                self.movers.remove(entity)
+                self.mover_index.remove(entity)
+        if self.player.ground is entity:
+            self.player.ground = None
+
+    def step(self, inputs=NO_INPUTS, dt=1):
+        player = self.player
+        profiler = self.profiler
+        self.tick += dt
+        ground = player.ground
+        ground_x = ground.rect.x if ground is not None else 0
+        dx, dy = player.update(inputs, dt)
+        for platform in self.mover_index.query(self.active_rect()):
+            platform.advance(self.tick)
+            self.platform_index.move(platform)
+        if ground is not None and player.ground is ground:
+            dx += ground.rect.x - ground_x
+        if profiler is not None:
+            profiler.mark("physics")
+        died = False
+        start = player.rect.copy()
+        self.move_player(dx, dy)
+        player.air_ticks = 0 if player.on_ground else min(player.air_ticks + dt, COYOTE_TICKS + 1)
+        swept = start.union(player.rect)
+        if player.rect.y > HEIGHT + 100:
+            player.respawn()
+        if profiler is not None:
+            profiler.mark("collide_platforms")
+        activated = None
+        for checkpoint in self.checkpoint_index.query(swept):
+            if checkpoint.activate():
+                activated = checkpoint
+            player.checkpoint = checkpoint.rect.topleft
+        if profiler is not None:
+            profiler.mark("collide_checkpoints")
+        finished = swept.colliderect(self.finish_rect)
+        for damage in self.damage_index.query(swept):
+            damage.death()
+            player.respawn()
+            died = True
+            finished = False
+        if profiler is not None:
+            profiler.mark("collide_lava")
+        return State(self.tick, player.rect.x, player.rect.y, player.velocity, player.on_ground,
+                     player.checkpoint, player.jumped, died, finished, activated)
+
+    def move_player(self, dx, dy):
+        rect = self.player.rect
+        if dx:
+            start = rect.copy()
+            rect.x += dx
+            hits = [hit.rect for hit in self.platform_index.query(start.union(rect))
+                    if hit.rect.top < rect.bottom and hit.rect.bottom > rect.top]
+            if dx > 0:
+                blocking = [hit.left for hit in hits if hit.left >= start.right]
+                if blocking:
+                    rect.right = min(rect.right, min(blocking))
+            else:
+                blocking = [hit.right for hit in hits if hit.right <= start.left]
+                if blocking:
+                    rect.left = max(rect.left, max(blocking))
+        self.move_player_y(dy)
+
+    def move_player_y(self, dy):
+        player = self.player
+        rect = player.rect
+        start = rect.copy()
+        rect.y += dy
+        hits = [hit for hit in self.platform_index.query(start.union(rect))
+                if hit.rect.left < rect.right and hit.rect.right > rect.left]
+        player.on_ground = False
+        player.ground = None
+        if dy >= 0:
+            landing = [hit for hit in hits if hit.rect.top >= start.bottom or hit.rect.colliderect(start)]
+            if not landing and player.velocity >= 0:
+                landing = [hit for hit in self.platform_index.query(rect.move(0, 1)) if hit.rect.top == rect.bottom]
+            if landing:
+                ground = min(landing, key=lambda hit: hit.rect.top)
+                rect.bottom = ground.rect.top
+                player.on_ground = True
+                player.ground = ground
+                player.velocity = 0
+        else:
+            ceilings = [hit.rect.bottom for hit in hits if hit.rect.bottom <= start.top]
+            if ceilings:
+                rect.top = max(rect.top, max(ceilings))
+                player.velocity = 0
+
+    def snapshot(self):
+        player = self.player
+        checkpoints = self.level.checkpoints
+        blob = bytearray(SNAPSHOT_HEADER.size + SNAPSHOT_MOVER.size * len(self.movers) + len(checkpoints))
+        ground = self.movers.index(player.ground) if player.ground in self.movers else -1
+        SNAPSHOT_HEADER.pack_into(blob, 0, SNAPSHOT_MAGIC, self.tick, self.level.number, player.rect.x, player.rect.y,
+                                  player.velocity, player.on_ground, player.jump_buffer, player.air_ticks, ground,
+                                  *player.checkpoint, len(self.movers), len(checkpoints))
+        offset = SNAPSHOT_HEADER.size
+        for platform in self.movers:
+            SNAPSHOT_MOVER.pack_into(blob, offset, platform.rect.x, platform.direction, platform.tick)
+            offset += SNAPSHOT_MOVER.size
+        blob[offset:] = bytes(checkpoint.active for checkpoint in checkpoints)
+        return bytes(blob)
+
+    def restore(self, blob):
+        magic, tick, number, x, y, velocity, on_ground, jump_buffer, air_ticks, ground, cx, cy, movers, checkpoints = \
+            SNAPSHOT_HEADER.unpack_from(blob)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Неизвестный формат снимка")
+        if number != self.level.number or movers != len(self.movers) or checkpoints != len(self.level.checkpoints):
+            raise ValueError("Снимок сделан на другом уровне")
+        self.tick = tick
+        player = self.player
+        player.rect.topleft = (x, y)
+        player.prev_pos = (x, y)
+        player.velocity = velocity
+        player.on_ground = bool(on_ground)
+        player.jump_buffer = jump_buffer
+        player.air_ticks = air_ticks
+        player.ground = self.movers[ground] if ground >= 0 else None
+        player.checkpoint = (cx, cy)
+        player.jumped = False
+        offset = SNAPSHOT_HEADER.size
+        for platform, (px, direction, mover_tick) in zip(self.movers, SNAPSHOT_MOVER.iter_unpack(
+                blob[offset:offset + SNAPSHOT_MOVER.size * movers])):
+            platform.rect.x = px
+            platform.prev_pos = platform.rect.topleft
+            platform.direction = direction
+            platform.tick = mover_tick
+            self.platform_index.move(platform)
+        offset += SNAPSHOT_MOVER.size * movers
+        for checkpoint, active in zip(self.level.checkpoints, blob[offset:]):
+            if active:
+                checkpoint.activate()
+            elif checkpoint.active:
+                checkpoint.deactivate()
+
+    def active_rect(self):
+        return self.player.rect.inflate(2 * ACTIVE_MARGIN_X, 2 * ACTIVE_MARGIN_Y)
+
+    def static_sprites(self, rect):
+        sprites = [p for p in self.platform_index.query(rect) if not isinstance(p, MovingPlatform)]
+        sprites.extend(self.damage_index.query(rect))
+        return sprites
+
+    def visible_sprites(self, rect):
+        sprites = self.checkpoint_index.query(rect)
+        for platform in self.mover_index.query(rect):
+            if platform.tick != self.tick:
+                platform.advance(self.tick)
+                self.platform_index.move(platform)
+            sprites.append(platform)
+        sprites.append(self.player)
+        return sprites
+
+    def run(self, inputs, max_ticks=None, dt=1):
+        state = None
+        for inp in inputs:
+            state = self.step(inp, dt)
+            if state.finished or (max_ticks is not None and state.tick >= max_ticks):
+                break
+        return state